@@ -1,12 +1,28 @@
+import sys
+
 from problem.pacmanProblem import PacmanProblem
 from problem.searchPlus import depth_first_graph_search, depth_first_graph_search_count
+from problem.portfolio import portfolio_search
+
 
+if __name__ == "__main__":
+    # the portfolio starts processes, which re-import this module under the spawn start method
+    gx = PacmanProblem()
+    result, expanded = depth_first_graph_search_count(gx)
+    if result:
+        print(f"Solution Prof-prim (graph) with cost {result.path_cost}: {result.solution()}")
+    else:
+        print('No solution')
+    print(f"Expanded = {expanded}")
 
-	
-gx = PacmanProblem()
-result, expanded = depth_first_graph_search_count(gx)
-if result:
-    print(f"Solution Prof-prim (graph) with cost {result.path_cost}: {result.solution()}")
-else:
-    print('No solution')
-print(f"Expanded = {expanded}")
\ No newline at end of file
+    # deadline in seconds for the portfolio, from the command line, and where it learns which engine to try first
+    deadline = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    stats = sys.argv[2] if len(sys.argv) > 2 else "portfolio_stats.json"
+    conditions = gx.conditions
+    outcome = portfolio_search(gx, deadline=deadline, stats=stats, key=f"T={conditions.T} M={conditions.M} P={conditions.P}")
+    if outcome.cost is None:
+        print(f"No solution within {deadline}s")
+    else:
+        proof = "optimal" if outcome.optimal else "best within the deadline"
+        print(f"Portfolio solution ({outcome.engine}, {proof}) with cost {outcome.cost} after {outcome.elapsed:.3f}s: "
+              f"{outcome.actions}")
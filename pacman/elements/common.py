@@ -71,12 +71,7 @@ class NonStaticElement:
 
     @classmethod
     def from_board(cls, target_element: Element, board):
-        for line in board:
-            line: list
-            for element in line:
-                element: BoardElement
-                if element.get_element() == target_element:
-                    board_element = element
+        board_element = board.find_all(target_element)[-1]
         return cls(
             board_element
         )
@@ -1,15 +1,6 @@
-from pacman.elements import Element, BoardElement
+from pacman.elements import Element
 
 class SuperGum:
     @staticmethod
     def find_all(board) -> list:
-        gums = list()
-        for line in board:
-            line: list
-            for element in line:
-                element: BoardElement
-                if element.get_element() == Element.SUPER_GUM:
-                    gums.append(
-                        element
-                    )
-        return gums
\ No newline at end of file
+        return board.find_all(Element.SUPER_GUM)
\ No newline at end of file
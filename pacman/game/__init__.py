@@ -1,3 +1,11 @@
 from pacman.game.board import *
+from pacman.game.bitboard import *
 from pacman.game.common import *
-from pacman.game.solvers import *
\ No newline at end of file
+from pacman.game.zobrist import *
+from pacman.game.maze import *
+from pacman.game.distance import *
+from pacman.game.feasibility import *
+from pacman.game.pattern import *
+from pacman.game.visits import *
+from pacman.game.state import *
+from pacman.game.solvers import *
@@ -0,0 +1,148 @@
+from pacman.space import Vector
+from pacman.elements import Element, BoardElement
+from pacman.game import Board
+
+class BitBoard:
+    """
+    Board engine backed by a flat bytearray with one byte of flags per cell, a drop-in replacement for Board
+    (same get/put/find_closest/set_empty/copy API) for big mazes.
+
+    The grid is padded with a border of SENTINEL cells, so the neighbours of any cell of the board are
+    always valid indexes: get/put/set_empty need no bounds checks (a vector may be at most one cell off the
+    board, like a neighbour of a board cell is) and testing a cell is a single mask operation, as in is_wall,
+    is_gum and is_free. Maze reads a BitBoard through those tests, without building any BoardElement.
+    Copying a board is a single bytearray copy.
+    """
+    WALL = 1
+    GHOST = 2
+    SUPER_GUM = 4
+    PACMAN = 8
+    NONE = 16
+    UNKNOWN = 32
+    SENTINEL = 64
+
+    BLOCKED = WALL | GHOST | SENTINEL
+
+    flags = {
+        Element.WALL: WALL,
+        Element.GHOST: GHOST,
+        Element.SUPER_GUM: SUPER_GUM,
+        Element.PACMAN: PACMAN,
+        Element.EMPTY: 0,
+        Element.NONE: NONE,
+        None: UNKNOWN
+    }
+    elements = {flag: element for element, flag in flags.items()}
+
+    def __init__(self, cells: bytearray, rows: int, dim: int) -> None:
+        self.cells = cells
+        self.rows = rows
+        self.dim = dim
+        self.stride = dim + 2
+
+    def index(self, x: int, y: int) -> int:
+        return (x + 1) * self.stride + y + 1
+
+    def coordinates(self, index: int) -> tuple:
+        return index // self.stride - 1, index % self.stride - 1
+
+    def is_wall(self, index: int) -> bool:
+        return bool(self.cells[index] & BitBoard.WALL)
+
+    def is_gum(self, index: int) -> bool:
+        return bool(self.cells[index] & BitBoard.SUPER_GUM)
+
+    def is_free(self, index: int) -> bool:
+        return not self.cells[index] & BitBoard.BLOCKED
+
+    @property
+    def lines(self) -> list:
+        return list(self)
+
+    def __iter__(self):
+        for x in range(self.rows):
+            yield [self.get(Vector(x, y)) for y in range(self.dim)]
+
+    def get(self, vector: Vector) -> BoardElement:
+        flags = self.cells[self.index(*vector)]
+        if flags & BitBoard.SENTINEL:
+            return None
+        return BoardElement(BitBoard.elements[flags], vector)
+
+    def put(self, element: BoardElement, vector: Vector) -> bool:
+        index = self.index(*vector)
+        if self.cells[index] & BitBoard.SENTINEL:
+            return False
+        self.cells[index] = BitBoard.flags[element.get_element()]
+        return True
+
+    def _indexes(self, element: Element) -> list:
+        """ Indexes of every cell holding element, in row order """
+        flag = bytes((BitBoard.flags[element],))
+        found = []
+        index = self.cells.find(flag)
+        while index >= 0:
+            found.append(index)
+            index = self.cells.find(flag, index + 1)
+        return found
+
+    def find_all(self, element: Element) -> list:
+        found = []
+        for index in self._indexes(element):
+            x, y = self.coordinates(index)
+            found.append(BoardElement(element, Vector(x, y)))
+        return found
+
+    def find_closest(self, vector: Vector, element: Element):
+        closest_distance = self.dim
+        closest_position = None
+        for index in self._indexes(element):
+            x, y = self.coordinates(index)
+            distance = abs(vector.x - x) + abs(vector.y - y)
+            if distance < closest_distance:
+                closest_distance = distance
+                closest_position = Vector(x, y)
+
+        return closest_position, closest_distance
+
+    def set_empty(self, vector: Vector) -> bool:
+        index = self.index(*vector)
+        if self.cells[index] & BitBoard.SENTINEL:
+            return False
+        self.cells[index] = 0
+        return True
+
+    def copy(self):
+        return BitBoard(
+            self.cells.copy(),
+            self.rows,
+            self.dim
+        )
+
+    @classmethod
+    def from_board(cls, board: Board):
+        rows = len(board.lines)
+        dim = board.dim
+        border = bytes([BitBoard.SENTINEL])
+        cells = bytearray(border * (dim + 3) + (bytes(dim) + border * 2) * rows + border * (dim + 1))
+        bitboard = cls(cells, rows, dim)
+        for line in board:
+            for element in line:
+                element: BoardElement
+                bitboard.put(element, element.get_position())
+        return bitboard
+
+    @classmethod
+    def from_input(cls, input: list):
+        return cls.from_board(
+            Board.from_input(input)
+        )
+
+    def __str__(self) -> str:
+        string = ""
+        for line in self:
+            for element in line:
+                string += f"{element} "
+            string += "\n"
+
+        return string
@@ -31,6 +31,15 @@ class Board:
         return False
     
 
+    def find_all(self, element: Element) -> list:
+        found = []
+        for line in self.lines:
+            for board_element in line:
+                board_element: BoardElement
+                if board_element.get_element() == element:
+                    found.append(board_element)
+        return found
+
     def find_closest(self, vector: Vector, element: Element):
         closest_distance = self.dim
         closest_position = None
@@ -0,0 +1,56 @@
+from array import array
+from collections import deque
+
+from pacman.game import Maze
+
+class DistanceOracle:
+    """
+    True maze distances (walls and ghost included), computed once per maze by breadth first search.
+
+    The distances from every supergum to every cell are kept in one compact array per gum, so the distance
+    from a cell to the closest gum of a gum mask is answered in O(#gums). Distances from any other cell are
+    computed on demand and cached.
+    """
+    def __init__(self, maze: Maze) -> None:
+        self.maze = maze
+        self.typecode = "H" if maze.size < 0xFFFF else "I"
+        self.unreachable = (1 << (8 * array(self.typecode).itemsize)) - 1
+        self.sources = {}
+        self.gums = tuple(self.from_cell(cell) for cell in maze.gums)
+
+    def from_cell(self, source: int) -> array:
+        """ Distances from source to every cell (unreachable cells hold self.unreachable) """
+        distances = self.sources.get(source)
+        if distances is not None:
+            return distances
+
+        distances = array(self.typecode, [self.unreachable]) * self.maze.size
+        distances[source] = 0
+        moves = self.maze.moves
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell] + 1
+            for _, target in moves[cell]:
+                if distances[target] == self.unreachable:
+                    distances[target] = distance
+                    queue.append(target)
+
+        self.sources[source] = distances
+        return distances
+
+    def distance(self, source: int, target: int) -> int:
+        return self.from_cell(source)[target]
+
+    def nearest(self, cell: int, gums: int) -> int:
+        """ Distance from cell to the closest gum of the mask gums (self.unreachable if there is none) """
+        closest = self.unreachable
+        bit = 0
+        while gums:
+            if gums & 1:
+                distance = self.gums[bit][cell]
+                if distance < closest:
+                    closest = distance
+            gums >>= 1
+            bit += 1
+        return closest
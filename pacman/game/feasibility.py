@@ -0,0 +1,103 @@
+from pacman.game import Maze, DistanceOracle
+
+class FeasibilityOracle:
+    """
+    Exact answer to "can pacman still reach the goal (T steps taken) from here".
+
+    Pacman may only move while the ghost is afraid (fear >= 1), and eating a supergum sets the fear back to P.
+    Whether T steps can still be taken depends on the cell, the steps, the fear and the remaining supergums
+    only: visit counts change the cost of a path, never whether it exists. Feasibility is solved over that
+    abstract state by a memoized depth first search, so every state is solved at most once per problem and
+    a query is then a dict lookup.
+
+    A fear that lasts until the goal makes the state feasible outright when pacman can step to a cell without
+    a supergum and back (moves are symmetric), or when eating one resets the fear to a value that lasts too;
+    otherwise eating would cut the fear short, and the state is searched. Two sound bounds (the closest
+    supergum within reach, enough supergums left to last until the goal) reject most dead states before any
+    search.
+    """
+    def __init__(self, maze: Maze, distances: DistanceOracle, T: int, P: int) -> None:
+        self.maze = maze
+        self.distances = distances
+        self.T = T
+        self.P = P
+        self.memo = {}
+
+    def key(self, cell: int, steps: int, fear: int, gums: int) -> int:
+        # a fear of at least the steps left lasts as long as any larger one, and below 1 pacman cannot move:
+        # clamping the fear to [0, T] keeps keys of different states apart without telling equivalent ones apart
+        fear = max(0, min(fear, self.T - steps))
+        return (((steps * self.maze.size + cell) * (self.T + 1) + fear) << len(self.maze.gums)) | gums
+
+    def child(self, target: int, steps: int, fear: int, gums: int) -> tuple:
+        """ Abstract state reached by moving into target """
+        bit = self.maze.gum_bits.get(target)
+        if bit is not None and gums >> bit & 1:
+            return target, steps + 1, self.P, gums & ~(1 << bit)
+        return target, steps + 1, fear - 1, gums
+
+    def _back_and_forth(self, cell: int, gums: int, remaining: int) -> bool:
+        """ True if a fear lasting remaining steps is sure to last until the goal: the fear after eating a
+        supergum (P) lasts too, or pacman can step next door without eating and come back """
+        if self.P >= remaining:
+            return True
+        for _, target in self.maze.moves[cell]:
+            bit = self.maze.gum_bits.get(target)
+            if bit is None or not gums >> bit & 1:
+                return True
+        return False
+
+    def _bounded(self, cell: int, steps: int, fear: int, gums: int):
+        """ True or False when the state is decided without searching, None otherwise """
+        remaining = self.T - steps
+        if remaining <= 0:
+            return True
+        if fear >= remaining and self._back_and_forth(cell, gums, remaining):
+            return bool(self.maze.moves[cell])
+        if fear < 1 or not gums:
+            return False
+        if self.distances.nearest(cell, gums) > fear:
+            return False
+        if fear + bin(gums).count("1") * self.P < remaining:
+            return False
+        return self.memo.get(self.key(cell, steps, fear, gums))
+
+    def feasible(self, cell: int, steps: int, fear: int, gums: int) -> bool:
+        known = self._bounded(cell, steps, fear, gums)
+        if known is not None:
+            return known
+
+        moves = self.maze.moves
+        stack = [(self.key(cell, steps, fear, gums), steps, fear, gums, iter(moves[cell]))]
+        found = False
+        while stack:
+            key, steps, fear, gums, children = stack[-1]
+            if found:
+                # a child reaches the goal, so does its parent
+                self.memo[key] = True
+                stack.pop()
+                continue
+            for _, target in children:
+                child = self.child(target, steps, fear, gums)
+                known = self._bounded(*child)
+                if known is None:
+                    stack.append((self.key(*child), child[1], child[2], child[3], iter(moves[target])))
+                    break
+                if known:
+                    found = True
+                    break
+            else:
+                self.memo[key] = False
+                stack.pop()
+        return found
+
+    def actions(self, cell: int, steps: int, fear: int, gums: int) -> list:
+        """ Actions from the state whose target is still feasible (none when the state itself is dead) """
+        if steps >= self.T:
+            return [action for action, _ in self.maze.moves[cell]]
+        if not self.feasible(cell, steps, fear, gums):
+            return []
+        return [
+            action for action, target in self.maze.moves[cell]
+            if self.feasible(*self.child(target, steps, fear, gums))
+        ]
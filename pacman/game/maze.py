@@ -0,0 +1,136 @@
+import hashlib
+
+from pacman.space import Vector, Direction
+from pacman.elements import Element, BoardElement
+from pacman.game import Board, BitBoard, Zobrist
+
+class Maze:
+    """
+    Static part of a Pacman world. It is built once per problem from the initial board and shared by every
+    state, which then only carries what changes along a path (see CompactState).
+
+    Cells are numbered row by row: cell = row * dim + col. moves[cell] is the tuple of (action, target cell) of
+    the moves allowed from cell, in the order of Direction.get_options, so expanding a state is a table lookup.
+    """
+
+    # (action, row step, column step) of every direction, in the order of Direction.get_options
+    directions = tuple(
+        (Direction(direction).to_string(), direction.x, direction.y) for direction in Direction.get_options()
+    )
+
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self.dim = board.dim
+        self.rows = board.rows if isinstance(board, BitBoard) else len(board.lines)
+        self.size = self.rows * self.dim
+
+        if isinstance(board, BitBoard):
+            walls, gums = self._read_bitboard(board)
+        else:
+            walls, gums = self._read_board(board)
+
+        self.walls = frozenset(walls)
+        self.gums = tuple(gums)
+        self.gum_bits = {cell: bit for bit, cell in enumerate(self.gums)}
+        self.all_gums = (1 << len(self.gums)) - 1
+        if isinstance(board, BitBoard):
+            self.moves = tuple(self._bitboard_moves(board, cell) for cell in range(self.size))
+        else:
+            self.moves = tuple(self._moves(cell) for cell in range(self.size))
+        self.region_size = self._region_sizes()
+        self.zobrist = Zobrist(self.size, len(self.gums))
+
+    def _read_board(self, board: Board) -> tuple:
+        """ Walls and supergums of the board (ghost and start are set on the way), by looking at every element """
+        walls = set()
+        gums = []
+        self.ghost = None
+        self.start = None
+        for line in board:
+            for element in line:
+                element: BoardElement
+                cell = self.cell(element.get_position())
+                kind = element.get_element()
+                if kind == Element.WALL:
+                    walls.add(cell)
+                elif kind == Element.GHOST:
+                    self.ghost = cell
+                elif kind == Element.PACMAN:
+                    self.start = cell
+                elif kind == Element.SUPER_GUM:
+                    gums.append(cell)
+        return walls, gums
+
+    def _read_bitboard(self, board: BitBoard) -> tuple:
+        """ Same as _read_board, finding each kind of element in the bytearray of the BitBoard """
+        def cells(element):
+            return [self.cell(board.coordinates(index)) for index in board._indexes(element)]
+
+        ghosts, starts = cells(Element.GHOST), cells(Element.PACMAN)
+        self.ghost = ghosts[-1] if ghosts else None
+        self.start = starts[-1] if starts else None
+        return set(cells(Element.WALL)), cells(Element.SUPER_GUM)
+
+    def _bitboard_moves(self, board: BitBoard, cell: int) -> tuple:
+        """ Same as _moves, with the mask tests of the BitBoard: its sentinel border makes bounds checks useless """
+        index = board.index(cell // self.dim, cell % self.dim)
+        if not board.is_free(index):
+            return ()
+        return tuple(
+            (action, cell + x * self.dim + y)
+            for action, x, y in Maze.directions if board.is_free(index + x * board.stride + y)
+        )
+
+    def _moves(self, cell: int) -> tuple:
+        if not self.is_free(cell):
+            return ()
+        x, y = cell // self.dim, cell % self.dim
+        moves = []
+        for direction in Direction.get_options():
+            action = Direction(direction).to_string()
+            tx, ty = x + direction.x, y + direction.y
+            if tx < 0 or ty < 0 or tx >= self.rows or ty >= self.dim:
+                continue
+            target = tx * self.dim + ty
+            if self.is_free(target):
+                moves.append((action, target))
+        return tuple(moves)
+
+    def _region_sizes(self) -> tuple:
+        """ Number of cells of the region (cells reachable from one another) of every free cell """
+        sizes = [0] * self.size
+        for cell in range(self.size):
+            if sizes[cell] or not self.is_free(cell):
+                continue
+            region, stack = {cell}, [cell]
+            while stack:
+                for _, target in self.moves[stack.pop()]:
+                    if target not in region:
+                        region.add(target)
+                        stack.append(target)
+            for member in region:
+                sizes[member] = len(region)
+        return tuple(sizes)
+
+    def cell(self, vector: Vector) -> int:
+        x, y = vector
+        return x * self.dim + y
+
+    def position(self, cell: int) -> Vector:
+        return Vector(cell // self.dim, cell % self.dim)
+
+    def is_free(self, cell: int) -> bool:
+        """ True if pacman can stand on the cell """
+        return cell not in self.walls and cell != self.ghost
+
+    def target(self, cell: int, action: str):
+        """ Cell reached from cell by action, or None if the move leaves the board or hits a wall or the ghost """
+        for move, target in self.moves[cell]:
+            if move == action:
+                return target
+        return None
+
+    def digest(self) -> str:
+        """ Hash of the layout (walls, ghost, pacman and supergums), the same in every process and every run """
+        layout = (self.rows, self.dim, sorted(self.walls), self.ghost, self.start, self.gums)
+        return hashlib.sha256(repr(layout).encode()).hexdigest()
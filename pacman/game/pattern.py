@@ -0,0 +1,138 @@
+import json
+import os
+from array import array
+
+from pacman.game import Maze
+
+class PatternDatabase:
+    """
+    Exact costs of a relaxed Pacman problem, precomputed for every (remaining steps, cell, fear, remaining
+    supergums) of a maze, used as an admissible heuristic with O(1) lookups.
+
+    The relaxation keeps the moves, the fear and the supergums of the real game but forgets the visit counts:
+    a step costs 2 when its target is known to have been visited already (the start cell, the cell of an eaten
+    supergum, the cell the relaxed path just came from) and 1 otherwise. Every real step costs at least as much,
+    so the relaxed cost of reaching the goal is a lower bound of the real one.
+
+    The table is built backwards, one layer of remaining steps at a time, and stored in one compact array
+    (unreachable goals hold self.unreachable). It has (T + 1) * size * (max fear + 1) * 2 ** #gums entries,
+    which is meant for the small mazes the exact searches can solve. Databases can be saved and loaded back,
+    keyed by the maze digest and the game conditions.
+    """
+    # index of the "came from" of a path that has not moved yet, after the 4 directions
+    NOWHERE = 4
+
+    def __init__(self, maze: Maze, T: int, P: int, M: int, table: array = None) -> None:
+        self.maze = maze
+        self.T = T
+        self.P = P
+        self.fears = max(M, P) + 1
+        self.n_gums = 1 << len(maze.gums)
+        self.typecode = "H" if 2 * T < 0xFFFF else "I"
+        self.unreachable = (1 << (8 * array(self.typecode).itemsize)) - 1
+        self.table = table if table is not None else self._build()
+
+    def index(self, remaining: int, cell: int, fear: int, gums: int) -> int:
+        fear = min(fear, remaining, self.fears - 1)
+        return ((remaining * self.maze.size + cell) * self.fears + fear) * self.n_gums + gums
+
+    def lookup(self, cell: int, steps: int, fear: int, gums: int) -> int:
+        """ Relaxed cost from the state to the goal (self.unreachable if the goal cannot be reached) """
+        remaining = self.T - steps
+        if remaining <= 0:
+            return 0
+        return self.table[self.index(remaining, cell, fear, gums)]
+
+    def _build(self) -> array:
+        maze = self.maze
+        fears, n_gums, unreachable = self.fears, self.n_gums, self.unreachable
+        free = [cell for cell in range(maze.size) if maze.moves[cell]]
+        # back[cell][i]: position of cell among the moves of the i-th target of cell
+        back = {
+            cell: [[t for _, t in maze.moves[target]].index(cell) for _, target in maze.moves[cell]]
+            for cell in free
+        }
+        width = 5 * fears * n_gums
+
+        table = array(self.typecode, [unreachable]) * ((self.T + 1) * maze.size * fears * n_gums)
+        previous = [0] * (maze.size * width)
+        for cell in free:
+            for fear in range(fears):
+                start = self.index(0, cell, fear, 0)
+                table[start:start + n_gums] = array(self.typecode, [0]) * n_gums
+
+        for remaining in range(1, self.T + 1):
+            layer = [unreachable] * (maze.size * width)
+            for cell in free:
+                moves = maze.moves[cell]
+                for fear in range(1, min(fears - 1, remaining) + 1):
+                    for gums in range(n_gums):
+                        # cost of every move, and of the same move when it walks back
+                        forward, backward = [], []
+                        for (_, target), came_from in zip(moves, back[cell]):
+                            bit = maze.gum_bits.get(target)
+                            if bit is not None and gums >> bit & 1:
+                                next_fear, next_gums, cost = self.P, gums & ~(1 << bit), 1
+                            else:
+                                next_fear, next_gums = fear - 1, gums
+                                cost = 2 if bit is not None or target == maze.start else 1
+                            next_fear = min(next_fear, remaining - 1, fears - 1)
+                            value = previous[((target * 5 + came_from) * fears + next_fear) * n_gums + next_gums]
+                            if value == unreachable:
+                                forward.append(unreachable)
+                                backward.append(unreachable)
+                            else:
+                                forward.append(cost + value)
+                                backward.append(max(cost, 2) + value)
+
+                        # walking back only matters when it was the one cheapest move
+                        ranked = sorted(forward)
+                        best = ranked[0]
+                        second = ranked[1] if len(ranked) > 1 else unreachable
+                        base = cell * 5
+                        for came_from, value in enumerate(forward):
+                            if value == best and second != best:
+                                value = min(second, backward[came_from])
+                            else:
+                                value = best
+                            layer[((base + came_from) * fears + fear) * n_gums + gums] = value
+                        layer[((base + self.NOWHERE) * fears + fear) * n_gums + gums] = best
+                        table[self.index(remaining, cell, fear, gums)] = best
+            previous = layer
+        return table
+
+    @staticmethod
+    def key(maze: Maze, T: int, P: int, M: int) -> str:
+        return f"{maze.digest()}-{T}-{P}-{max(M, P)}"
+
+    def save(self, directory: str) -> str:
+        """ Write the database to directory, named after its key, and return the file path """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.key(self.maze, self.T, self.P, self.fears - 1) + ".pdb")
+        header = {"T": self.T, "P": self.P, "M": self.fears - 1, "typecode": self.typecode}
+        with open(path, "wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            self.table.tofile(file)
+        return path
+
+    @classmethod
+    def load(cls, directory: str, maze: Maze, T: int, P: int, M: int):
+        """ Database of the maze and conditions saved in directory, or None if there is none """
+        path = os.path.join(directory, cls.key(maze, T, P, M) + ".pdb")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as file:
+            header = json.loads(file.readline())
+            table = array(header["typecode"])
+            table.frombytes(file.read())
+        return cls(maze, header["T"], header["P"], header["M"], table)
+
+    @classmethod
+    def cached(cls, maze: Maze, T: int, P: int, M: int, directory: str = None):
+        """ Load the database from directory, or build it (and save it there when a directory is given) """
+        database = cls.load(directory, maze, T, P, M) if directory else None
+        if database is None:
+            database = cls(maze, T, P, M)
+            if directory:
+                database.save(directory)
+        return database
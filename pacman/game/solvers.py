@@ -1,10 +1,19 @@
-from pacman.game import GameState
+from pacman.game import GameState, CompactState, MutableState, Maze
 from pacman.elements import Element, BoardElement
 from pacman.space import Direction
 
-class GameSolver:    
+class GameSolver:
     @staticmethod
-    def apply(state: GameState, action: str, max_fear: int):
+    def apply(state: GameState, action: str, max_fear: int, maze: Maze = None):
+        """
+        Move pacman. A GameState or a MutableState is changed in place; a CompactState is not, the new state is
+        returned with its Zobrist hash updated incrementally from the old one.
+        """
+        if isinstance(state, CompactState):
+            return GameSolver._apply_compact(state, action, max_fear, maze)
+        if isinstance(state, MutableState):
+            return GameSolver._apply_in_place(state, action, max_fear, maze)
+
         direction = Direction.from_string(action)
         current_pos = state.pacman.get_position()
         target_pos = current_pos + direction.vector
@@ -15,7 +24,7 @@ class GameSolver:
 
         if not board_element or board_element.element in (Element.WALL, Element.GHOST):
             return state
-        
+
         state.ghost.decrease_fear()
         state.pacman.mark_as_visited(target_pos)
         state.pacman.increase_steps()
@@ -31,7 +40,74 @@ class GameSolver:
         return state
 
     @staticmethod
-    def find_valid_directions(state: GameState) -> list:
+    def _apply_compact(state: CompactState, action: str, max_fear: int, maze: Maze) -> CompactState:
+        """ Same move as apply, on a CompactState: the new state shares nothing but the maze with the old one """
+        target = maze.target(state.cell, action)
+        if target is None:
+            return state
+
+        zobrist = maze.zobrist
+        if state.steps >= zobrist.horizon:
+            zobrist.reserve(state.steps + 1, max_fear)
+        visits = state.visits.increment(target, zobrist.visits)
+        key = state._hash ^ state.visits.fingerprint ^ visits.fingerprint
+        key ^= zobrist.cells[state.cell] ^ zobrist.cells[target]
+        key ^= zobrist.steps[state.steps] ^ zobrist.steps[state.steps + 1]
+
+        gums = state.gums
+        fear = state.fear - 1
+        bit = maze.gum_bits.get(target)
+        if bit is not None and gums >> bit & 1:
+            gums &= ~(1 << bit)
+            fear = max_fear
+            key ^= zobrist.gums[bit]
+            if max_fear > zobrist.max_fear:
+                zobrist.reserve(zobrist.horizon, max_fear)
+        key ^= zobrist.fears[state.fear] ^ zobrist.fears[fear]
+
+        return CompactState(target, fear, gums, state.steps + 1, visits, key)
+
+    @staticmethod
+    def _apply_in_place(state: MutableState, action: str, max_fear: int, maze: Maze) -> MutableState:
+        """ Same move as apply, changing the MutableState itself; GameSolver.undo reverts it """
+        target = maze.target(state.cell, action)
+        if target is None:
+            state.history.append(None)
+            return state
+
+        state.history.append((state.cell, state.fear, state.gums))
+        count = state.visits[target]
+        state.visited += not count
+        state.visits[target] = count + 1
+
+        fear = state.fear - 1
+        bit = maze.gum_bits.get(target)
+        if bit is not None and state.gums >> bit & 1:
+            state.gums &= ~(1 << bit)
+            fear = max_fear
+        state.fear = fear
+        state.steps += 1
+        state.cell = target
+        return state
+
+    @staticmethod
+    def undo(state: MutableState) -> MutableState:
+        """ Revert the last move applied to a MutableState """
+        previous = state.history.pop()
+        if previous is None:
+            return state
+
+        state.visits[state.cell] -= 1
+        state.visited -= not state.visits[state.cell]
+        state.steps -= 1
+        state.cell, state.fear, state.gums = previous
+        return state
+
+    @staticmethod
+    def find_valid_directions(state: GameState, maze: Maze = None) -> list:
+        if not isinstance(state, GameState):
+            return [action for action, _ in maze.moves[state.cell]]
+
         pacman = state.pacman
         current_pos = pacman.get_position()
         valid_directions = []
@@ -43,4 +119,4 @@ class GameSolver:
                 valid_directions.append(
                     Direction.to_string(Direction(direction))
                 )
-        return valid_directions
\ No newline at end of file
+        return valid_directions
@@ -0,0 +1,145 @@
+from pacman.elements import Element, BoardElement, Pacman, Ghost, SuperGum
+from pacman.game import GameState, Maze, VisitCounts
+
+class CompactState:
+    """
+    Immutable and hashable encoding of a GameState. Only the values that change along a path are kept:
+
+        cell   -- index of the pacman cell (row * dim + col)
+        fear   -- current fear of the ghost
+        gums   -- bitmask of the supergums still on the board (bit i is the i-th gum of the initial board)
+        steps  -- number of steps taken by pacman
+        visits -- number of visits of every cell, indexed like cell, as a persistent VisitCounts
+
+    The hash is the Zobrist key of the state (see Zobrist), given by whoever builds the state: GameSolver.apply
+    updates it incrementally, so states can be used in sets and as dict keys by the graph searchers at O(1).
+    """
+    __slots__ = ("cell", "fear", "gums", "steps", "visits", "_hash")
+
+    def __init__(self, cell: int, fear: int, gums: int, steps: int, visits: VisitCounts, key: int) -> None:
+        init = object.__setattr__
+        init(self, "cell", cell)
+        init(self, "fear", fear)
+        init(self, "gums", gums)
+        init(self, "steps", steps)
+        init(self, "visits", visits)
+        init(self, "_hash", key)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (CompactState, (self.cell, self.fear, self.gums, self.steps, self.visits, self._hash))
+
+    def get_cost(self, cell: int) -> int:
+        """ Cost of moving pacman into the given cell """
+        return self.visits[cell] + 1
+
+    @property
+    def visited(self) -> int:
+        """ Number of distinct cells visited """
+        return self.visits.distinct
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactState):
+            return False
+        return (
+            self._hash == other._hash
+            and self.cell == other.cell
+            and self.fear == other.fear
+            and self.gums == other.gums
+            and self.steps == other.steps
+            and self.visits == other.visits
+        )
+
+    @classmethod
+    def from_game_state(cls, state: GameState, maze: Maze):
+        """ Pack a GameState played on the given maze """
+        gums = 0
+        for gum in state.supergums:
+            gums |= 1 << maze.gum_bits[maze.cell(gum.get_position())]
+
+        visits = [0] * maze.size
+        for position, cost in state.pacman.visited_positions.items():
+            visits[maze.cell(position)] = cost - 1
+
+        cell = maze.cell(state.pacman.get_position())
+        fear = state.ghost.get_fear()
+        steps = state.pacman.get_steps()
+        visits = VisitCounts.from_counts(visits, maze.zobrist)
+        return cls(cell, fear, gums, steps, visits, maze.zobrist.hash(cell, fear, gums, steps, visits))
+
+    @classmethod
+    def initial(cls, maze: Maze, fear: int):
+        """ State at the start of a game played on the given maze """
+        visits = VisitCounts.empty(maze.size).increment(maze.start, maze.zobrist.visits)
+        key = maze.zobrist.hash(maze.start, fear, maze.all_gums, 0, visits)
+        return cls(maze.start, fear, maze.all_gums, 0, visits, key)
+
+    def to_game_state(self, maze: Maze) -> GameState:
+        """ Unpack into a GameState, with a board of its own """
+        board = maze.board.copy()
+        board.set_empty(maze.position(maze.start))
+        for bit, cell in enumerate(maze.gums):
+            if not self.gums >> bit & 1:
+                board.set_empty(maze.position(cell))
+
+        position = maze.position(self.cell)
+        element = BoardElement(Element.PACMAN, position)
+        board.put(element, position)
+
+        visited = {
+            maze.position(cell): count + 1
+            for cell, count in enumerate(self.visits) if count
+        }
+        ghost = Ghost.from_board(board)
+        ghost.set_fear(self.fear)
+        return GameState(
+            Pacman(element, self.steps, visited),
+            ghost,
+            SuperGum.find_all(board),
+            board
+        )
+
+    def __str__(self) -> str:
+        return f"Pacman - cell {self.cell} - steps = {self.steps} - fear = {self.fear} - gums = {self.gums:b}"
+
+    def __repr__(self) -> str:
+        return f"CompactState({self.cell}, {self.fear}, {self.gums:#b}, {self.steps})"
+
+
+class MutableState:
+    """
+    Working state of the in-place (make/unmake) searchers. It holds the same values as a CompactState, but
+    GameSolver.apply changes it in place and GameSolver.undo reverts the last move, so a depth first search
+    only needs one state for the whole tree. It has no Zobrist hash: none of those searchers needs one, so it
+    is only computed, from scratch, by freeze.
+    """
+    def __init__(self, cell: int, fear: int, gums: int, steps: int, visits: list) -> None:
+        self.cell = cell
+        self.fear = fear
+        self.gums = gums
+        self.steps = steps
+        self.visits = visits
+        self.visited = len(visits) - visits.count(0)
+        self.history = []
+
+    def get_cost(self, cell: int) -> int:
+        """ Cost of moving pacman into the given cell """
+        return self.visits[cell] + 1
+
+    @classmethod
+    def from_compact(cls, state: CompactState):
+        return cls(state.cell, state.fear, state.gums, state.steps, list(state.visits))
+
+    def freeze(self, maze: Maze) -> CompactState:
+        """ CompactState snapshot of the state played on the given maze """
+        visits = VisitCounts.from_counts(self.visits, maze.zobrist)
+        key = maze.zobrist.hash(self.cell, self.fear, self.gums, self.steps, visits)
+        return CompactState(self.cell, self.fear, self.gums, self.steps, visits, key)
+
+    def __str__(self) -> str:
+        return f"Pacman - cell {self.cell} - steps = {self.steps} - fear = {self.fear} - gums = {self.gums:b}"
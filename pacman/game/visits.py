@@ -0,0 +1,74 @@
+import math
+from array import array
+
+from pacman.game.zobrist import Zobrist
+
+class VisitCounts:
+    """
+    Persistent (immutable) map from cell index to number of visits, used by CompactState.
+
+    The counts live in a tuple of chunks of about sqrt(size) counts each. increment returns a new map that
+    shares every chunk but one with the old map, so a successor costs O(sqrt(size)) instead of a copy of every
+    count. The fingerprint (the XOR of the Zobrist visit keys of the counts) and the number of distinct visited
+    cells are kept up to date by increment, and two maps are compared chunk by chunk, shared chunks being equal
+    by identity.
+    """
+    __slots__ = ("chunks", "shift", "fingerprint", "distinct")
+
+    def __init__(self, chunks: tuple, shift: int, fingerprint: int, distinct: int) -> None:
+        self.chunks = chunks
+        self.shift = shift
+        self.fingerprint = fingerprint
+        self.distinct = distinct
+
+    @classmethod
+    def empty(cls, size: int):
+        shift = max(0, math.ceil(math.log2(max(size, 1))) // 2)
+        zeros = (0,) * (1 << shift)
+        return cls((zeros,) * -(-size >> shift), shift, 0, 0)
+
+    @classmethod
+    def from_counts(cls, counts: list, zobrist: Zobrist):
+        visits = cls.empty(len(counts))
+        width = 1 << visits.shift
+        chunks = []
+        for start in range(0, len(visits.chunks) * width, width):
+            chunk = tuple(counts[start:start + width])
+            chunks.append(chunk + (0,) * (width - len(chunk)))
+
+        fingerprint = 0
+        for cell, count in enumerate(counts):
+            fingerprint ^= zobrist.visit(cell, count)
+        return cls(tuple(chunks), visits.shift, fingerprint, len(counts) - list(counts).count(0))
+
+    def increment(self, cell: int, deltas: array):
+        """ New map with one more visit to cell; deltas is the Zobrist.visits table of the maze """
+        high, low = cell >> self.shift, cell & ((1 << self.shift) - 1)
+        chunk = self.chunks[high]
+        count = chunk[low]
+        chunk = chunk[:low] + (count + 1,) + chunk[low + 1:]
+        delta = deltas[cell * Zobrist.BUCKETS + count] if count < Zobrist.BUCKETS else 0
+        return VisitCounts(
+            self.chunks[:high] + (chunk,) + self.chunks[high + 1:],
+            self.shift,
+            self.fingerprint ^ delta,
+            self.distinct + (not count)
+        )
+
+    def __getitem__(self, cell: int) -> int:
+        return self.chunks[cell >> self.shift][cell & ((1 << self.shift) - 1)]
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield from chunk
+
+    def __len__(self) -> int:
+        return len(self.chunks) << self.shift
+
+    def __hash__(self) -> int:
+        return self.fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, VisitCounts):
+            return False
+        return self.fingerprint == other.fingerprint and self.chunks == other.chunks
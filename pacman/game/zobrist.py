@@ -0,0 +1,78 @@
+import random
+from array import array
+from functools import lru_cache
+
+MASK = (1 << 64) - 1
+
+@lru_cache(maxsize=1 << 16)
+def mix(value: int) -> int:
+    """ splitmix64 finalizer: a well spread 64 bit key for an integer (cached, moves keep asking for the same keys) """
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+class Zobrist:
+    """
+    Zobrist keys of a maze. The hash of a state is the XOR of the keys of its pacman cell, of every supergum
+    still on the board, of its fear, of its step count and of every visited cell with its visit count (counts
+    above BUCKETS share a key). A move only changes a few of those terms, so GameSolver.apply updates the hash
+    by XORing them out and in instead of hashing the whole state.
+
+    The keys a move needs are precomputed in flat tables: cells, gums, fears (indexed by fear; negative fears
+    are at the end of the list, where a negative index finds them), steps (indexed by steps) and visits, where
+    visits[cell * BUCKETS + count] is the change of the key of cell when its count goes from count to count + 1
+    (nothing changes from BUCKETS on, so the key of a count is the XOR of the changes below it). visits is
+    filled with random bytes in one call, so even a large maze gets its table at once. reserve grows fears and
+    steps when a state goes past them.
+
+    Keys depend only on the maze and the seed, so every process computes the same hash for the same state.
+    """
+    BUCKETS = 16
+    FEAR = 1 << 40
+    STEPS = 2 << 40
+    VISIT = 3 << 40
+
+    def __init__(self, size: int, n_gums: int, seed: int = 0) -> None:
+        generator = random.Random(seed)
+        self.cells = [generator.getrandbits(64) for _ in range(size)]
+        self.gums = [generator.getrandbits(64) for _ in range(n_gums)]
+        self.visits = array('Q', generator.randbytes(8 * size * Zobrist.BUCKETS))
+        self.fears = []
+        self.steps = []
+        self.max_fear = -1
+        self.horizon = -1
+
+    def reserve(self, horizon: int, max_fear: int) -> None:
+        """ Make room in fears and steps for states of up to horizon steps and a fear of up to max_fear """
+        if horizon <= self.horizon and max_fear <= self.max_fear:
+            return
+        self.horizon = max(horizon, 2 * self.horizon)
+        self.max_fear = max(max_fear, self.max_fear)
+        # along a path the fear drops by at most one per step
+        self.fears = [mix(Zobrist.FEAR + fear) for fear in range(self.max_fear + 1)]
+        self.fears += [mix(Zobrist.FEAR + fear) for fear in range(-self.horizon - 1, 0)]
+        self.steps = [mix(Zobrist.STEPS + steps) for steps in range(self.horizon + 1)]
+
+    def visit(self, cell: int, count: int) -> int:
+        """ Key of cell visited count times """
+        key = 0
+        start = cell * Zobrist.BUCKETS
+        for delta in self.visits[start:start + min(count, Zobrist.BUCKETS)]:
+            key ^= delta
+        return key
+
+    def gum_mask(self, gums: int) -> int:
+        key = 0
+        bit = 0
+        while gums:
+            if gums & 1:
+                key ^= self.gums[bit]
+            gums >>= 1
+            bit += 1
+        return key
+
+    def hash(self, cell: int, fear: int, gums: int, steps: int, visits) -> int:
+        """ Hash of a state computed from scratch; visits is a VisitCounts """
+        self.reserve(steps, fear)
+        return self.cells[cell] ^ self.fears[fear] ^ self.gum_mask(gums) ^ self.steps[steps] ^ visits.fingerprint
@@ -51,16 +51,17 @@ class Direction:
 
     @classmethod
     def from_string(cls, direction: str):
-        return cls(
+        return Direction.instances.get(direction) or cls(
             cls.string_parser.get(direction)
         )
 
     def to_string(self):
-        for direction, value in Direction.string_parser.items():
-            if value == self.vector:
-                return direction
-        return None
+        return Direction.names.get(self.vector)
 
     @classmethod
     def get_options(cls):
-        return [cls.NORTH, cls.WEST, cls.EAST, cls.SOUTH]
\ No newline at end of file
+        return [cls.NORTH, cls.WEST, cls.EAST, cls.SOUTH]
+
+
+Direction.names = {value: direction for direction, value in Direction.string_parser.items()}
+Direction.instances = {direction: Direction(value) for direction, value in Direction.string_parser.items()}
\ No newline at end of file
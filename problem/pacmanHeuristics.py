@@ -0,0 +1,108 @@
+"""Admissible heuristics for PacmanProblem.
+
+Every heuristic is a function h(problem, state) returning a lower bound on the
+cost still to pay from state to a goal. All of them start from the remaining
+steps R = T - steps, each costing at least 1, and add extra cost that no path
+can avoid. The functions are registered by name in `heuristics`, which is
+what PacmanProblem(heuristic=...) selects from."""
+
+import heapq
+
+infinity = float('inf')
+
+
+def zero(problem, state) -> int:
+    """No information: A* becomes uniform cost search."""
+    return 0
+
+
+def steps(problem, state) -> int:
+    """Every remaining step costs at least 1."""
+    return problem.conditions.T - state.steps
+
+
+def _revisits(remaining: int, unvisited: int) -> int:
+    """Cheapest cost of `remaining` steps when only `unvisited` cells have
+    never been visited: those steps cost 1, every other one at least 2."""
+    return remaining + max(0, remaining - unvisited)
+
+
+def _unvisited(problem, state) -> int:
+    """Never visited cells of the region of pacman. Every visited cell is in
+    that region, since pacman walked there."""
+    return problem.maze.region_size[state.cell] - state.visited
+
+
+def revisits(problem, state) -> int:
+    """Remaining steps, plus one for every step that must land on an already
+    visited cell because the region of pacman runs out of new cells."""
+    return _revisits(problem.conditions.T - state.steps, _unvisited(problem, state))
+
+
+def dead_ends(problem, state) -> int:
+    """revisits with one step of lookahead: the next move pays the real cost of
+    its target, so a pacman in a dead end (or surrounded by visited cells)
+    pays for the way back."""
+    remaining = problem.conditions.T - state.steps
+    if not remaining:
+        return 0
+    unvisited = _unvisited(problem, state)
+    best = None
+    for _, target in problem.maze.moves[state.cell]:
+        visits = state.visits[target]
+        bound = visits + 1 + _revisits(remaining - 1, unvisited - (not visits))
+        if best is None or bound < best:
+            best = bound
+    return best if best is not None else remaining
+
+
+def gums(problem, state) -> int:
+    """When the ghost fear does not last until the goal, pacman must still
+    reach one of the remaining supergums. Any walk to a gum pays, on top of 1
+    per step, the visits of every cell it enters; the cheapest such excess is
+    found with Dijkstra over the visit counts."""
+    remaining = problem.conditions.T - state.steps
+    if state.fear >= remaining or not state.gums:
+        return remaining
+
+    targets = {cell for bit, cell in enumerate(problem.maze.gums) if state.gums >> bit & 1}
+    moves = problem.maze.moves
+    visits = state.visits
+    best = {state.cell: 0}
+    queue = [(0, state.cell)]
+    while queue:
+        excess, cell = heapq.heappop(queue)
+        if cell in targets:
+            return remaining + excess
+        if excess > best[cell]:
+            continue
+        for _, target in moves[cell]:
+            cost = excess + visits[target]
+            if cost < best.get(target, cost + 1):
+                best[target] = cost
+                heapq.heappush(queue, (cost, target))
+    return remaining
+
+
+def pattern(problem, state) -> int:
+    """Exact cost of a relaxed game that forgets the visit counts except for
+    cells known to be visited (start, eaten supergums, the cell just left),
+    looked up in the pattern database of the problem."""
+    cost = problem.patterns.lookup(state.cell, state.steps, state.fear, state.gums)
+    return cost if cost != problem.patterns.unreachable else infinity
+
+
+def combined(problem, state) -> int:
+    """The largest of the bounds above."""
+    return max(dead_ends(problem, state), gums(problem, state))
+
+
+heuristics = {
+    "zero": zero,
+    "steps": steps,
+    "revisits": revisits,
+    "dead_ends": dead_ends,
+    "gums": gums,
+    "pattern": pattern,
+    "max": combined
+}
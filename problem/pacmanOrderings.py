@@ -0,0 +1,46 @@
+"""Move orderings for the depth first searches of PacmanProblem.
+
+Every ordering is a function order(problem, node, actions, incumbent) that
+returns the actions of node in the order to explore them, incumbent being the
+actions of the best solution found so far (None before the first one). The
+order never changes which solutions exist, only how early good ones are met:
+the sooner a cheap incumbent appears, the more branch and bound prunes. The
+functions are registered by name in `orderings`, to pass as
+depth_first_tree_search_all_count(problem, order=orderings[name])."""
+
+from problem.searchPlus import incumbent_first
+
+
+def _targets(problem, state) -> dict:
+    return {action: target for action, target in problem.maze.moves[state.cell]}
+
+
+def unvisited(problem, node, actions, incumbent) -> list:
+    """Cheapest moves first: a move costs the visits of its target plus one,
+    so never visited cells (cost 1) come first."""
+    targets = _targets(problem, node.state)
+    visits = node.state.visits
+    return sorted(actions, key=lambda action: visits[targets[action]])
+
+
+def nearest_gum(problem, node, actions, incumbent) -> list:
+    """Moves towards the closest remaining supergum first, which keeps the
+    ghost afraid for longer; ties are broken by unvisited."""
+    state = node.state
+    if not state.gums:
+        return unvisited(problem, node, actions, incumbent)
+    targets = _targets(problem, state)
+    nearest = problem.distances.nearest
+    return sorted(actions, key=lambda action: (nearest(targets[action], state.gums), state.visits[targets[action]]))
+
+
+def incumbent(problem, node, actions, incumbent) -> list:
+    """unvisited, with the move of the incumbent solution at this depth first."""
+    return incumbent_first(problem, node, unvisited(problem, node, actions, incumbent), incumbent)
+
+
+orderings = {
+    "unvisited": unvisited,
+    "nearest_gum": nearest_gum,
+    "incumbent": incumbent
+}
@@ -1,6 +1,6 @@
-from problem.searchPlus import Problem
-from pacman.game import GameConditions, GameState, GameSolver, Board
-from pacman.elements import Element
+from problem.searchPlus import Problem, Node
+from problem.pacmanHeuristics import heuristics
+from pacman.game import GameConditions, GameState, CompactState, MutableState, GameSolver, Board, Maze, DistanceOracle, FeasibilityOracle, PatternDatabase
 
 parametrosB="T=26\nM=6\nP=10"
 linha1B= "= = = = = = = = = =\n"
@@ -17,48 +17,123 @@ grelhaB=linha1B+linha2B+linha3B+linha4B+linha5B+linha6B+linha7B+linha8B+linha9B+
 mundoStandard=parametrosB + "\n" + grelhaB
 
 class PacmanProblem(Problem):    
-    def __init__(self, situacaoInicial=mundoStandard):
+    def __init__(self, situacaoInicial=mundoStandard, engine=Board, heuristic="max", pattern_directory=None,
+                 dominance=False):
+        """engine é a implementação do tabuleiro: Board ou BitBoard (para labirintos grandes);
+        heuristic é o nome de uma das heurísticas de pacmanHeuristics.heuristics (ou a própria função);
+        pattern_directory é onde as pattern databases são guardadas e procuradas (None: não se guardam);
+        dominance liga a poda de estados dominados (ver dominates), desligada por defeito porque no mundo
+        standard custa mais do que poupa"""
         params = situacaoInicial.split("\n")
         self.conditions = GameConditions.from_list(params[:3])
-        self.board = Board.from_input(params[3:])
-        self.initial = GameState.from_board(self.board, self.conditions.M)
+        self.board = engine.from_input(params[3:])
+        self.maze = Maze(self.board)
+        self.distances = DistanceOracle(self.maze)
+        self.feasibility = FeasibilityOracle(self.maze, self.distances, self.conditions.T, self.conditions.P)
+        self.maze.zobrist.reserve(self.conditions.T, max(self.conditions.M, self.conditions.P))
+        self.initial = CompactState.initial(self.maze, self.conditions.M)
+        self.pattern_directory = pattern_directory
+        self.dominance = dominance
+        self._patterns = None
+        self.use_heuristic(heuristic)
+
+    @property
+    def patterns(self) -> PatternDatabase:
+        """Pattern database do labirinto, construída (ou carregada) só quando é usada pela primeira vez"""
+        if self._patterns is None:
+            T, M, P = self.conditions.T, self.conditions.M, self.conditions.P
+            self._patterns = PatternDatabase.cached(self.maze, T, P, M, self.pattern_directory)
+        return self._patterns
+
+    def use_heuristic(self, heuristic):
+        """Escolhe a heurística usada por h, pelo nome ou dando a função h(problem, state)"""
+        self.heuristic = heuristics[heuristic] if isinstance(heuristic, str) else heuristic
+
+    def h(self, node):
+        """Minorante admissível do custo que falta pagar a partir do estado do nó"""
+        state = node.state if isinstance(node, Node) else node
+        return self.heuristic(self, state)
+
+    def game_state(self, state: CompactState) -> GameState:
+        """Expande um estado compacto no GameState (com tabuleiro) usado pelo GameSolver"""
+        return state.to_game_state(self.maze)
    
-    def actions(self, state: GameState):
-        state: GameState = state
-        pacman, ghost, supergums, board = state
-        fear_needed = self.conditions.T - (pacman.get_steps() + ghost.get_fear())
+    def actions(self, state: CompactState):
+        """Só as acções que ainda permitem chegar ao objectivo, decidido exactamente pelo FeasibilityOracle"""
+        return self.feasibility.actions(state.cell, state.steps, state.fear, state.gums)
 
-        if fear_needed > 0:
-            if not len(supergums):
-                return []
-            
-            _, distant_to_closest_gum = board.find_closest(pacman.get_position(), Element.SUPER_GUM)
-            if distant_to_closest_gum > ghost.get_fear():
-                return []
-            
-            if distant_to_closest_gum + (len(supergums) * self.conditions.P) < self.conditions.T - pacman.get_steps():
-                return []
-    
-        available_actions = GameSolver.find_valid_directions(state)
-        return available_actions
-        
-        
-    def result(self, state: GameState, action: str):
-        state: GameState = state
-        new = state.copy()
-        return GameSolver.apply(new, action, self.conditions.P)
-    
-    def path_cost(self, c: int, state1: GameState, action: str, next_state: GameState):
-        pacman_next_position = next_state.pacman.get_position()
+    def count_key(self, state: CompactState) -> int:
+        """As acções e o objectivo só dependem da célula, dos passos, do medo e das pastilhas que restam"""
+        return self.feasibility.key(state.cell, state.steps, state.fear, state.gums)
 
+    def dominance_key(self, state: CompactState) -> tuple:
+        """Só se comparam estados na mesma célula, no mesmo passo e com as mesmas pastilhas por comer
+        (None, sem poda, quando a dominância está desligada)"""
+        if not self.dominance:
+            return None
+        return (state.cell, state.steps, state.gums)
+
+    def dominates(self, state1: CompactState, cost1: int, state2: CompactState, cost2: int) -> bool:
+        """state1 domina state2 se tem pelo menos o mesmo medo (útil) e, mesmo pagando nos R passos que faltam
+        o maior excesso de visitas de uma célula em state1 sobre state2, não fica mais caro"""
+        if cost1 > cost2:
+            return False
+        remaining = self.conditions.T - state1.steps
+        # no mesmo passo as visitas somam o mesmo, logo se diferem há uma célula com excesso de pelo menos 1
+        same_visits = state1.visits == state2.visits
+        if not same_visits and cost1 + remaining > cost2:
+            return False
+        if state1.fear < state2.fear and state1.fear < remaining:
+            return False
+        if same_visits:
+            return True
+
+        excess = 0
+        for mine, theirs in zip(state1.visits.chunks, state2.visits.chunks):
+            if mine is theirs:
+                continue
+            for a, b in zip(mine, theirs):
+                if a - b > excess:
+                    excess = a - b
+                    if cost1 + remaining * excess > cost2:
+                        return False
+        return True
+
+    def successors(self, state: CompactState):
+        """(acção, estado seguinte, custo do movimento) de cada acção, numa só passagem: as acções do
+        FeasibilityOracle são sempre movimentos válidos, e entrar numa célula custa as suas visitas já contando
+        com esta, sem comparar estados"""
+        P, maze = self.conditions.P, self.maze
+        for action in self.actions(state):
+            next_state = GameSolver.apply(state, action, P, maze)
+            yield action, next_state, next_state.visits[next_state.cell]
+
+    def result(self, state: CompactState, action: str):
+        return GameSolver.apply(state, action, self.conditions.P, self.maze)
+    
+    def path_cost(self, c: int, state1: CompactState, action: str, next_state: CompactState):
         if state1 == next_state:
             return c
         
-        movement_cost = state1.pacman.get_cost(pacman_next_position)        
+        movement_cost = state1.get_cost(next_state.cell)
         return c + movement_cost
     
-    def goal_test(self, state: GameState):
-        return state.pacman.get_steps() == self.conditions.T
+    def goal_test(self, state: CompactState):
+        return state.steps == self.conditions.T
+
+    def mutable(self, state: CompactState = None) -> MutableState:
+        """Estado de trabalho das procuras em profundidade sem cópias (apply/undo); por defeito o inicial"""
+        return MutableState.from_compact(state or self.initial)
+
+    def apply(self, state: MutableState, action: str) -> int:
+        """Aplica a acção ao próprio estado e devolve o custo do movimento"""
+        cell = state.cell
+        GameSolver.apply(state, action, self.conditions.P, self.maze)
+        return state.visits[state.cell] if state.cell != cell else 0
+
+    def undo(self, state: MutableState):
+        """Desfaz o último apply"""
+        GameSolver.undo(state)
     
     def executa(p,estado,accoes,verbose=False):
         """Executa uma sequência de acções a partir do estado devolvendo o triplo formado pelo estado, 
@@ -81,6 +156,6 @@ class PacmanProblem(Problem):
                 break
         return (estado,custo,objectivo)
     
-    def display(self, state: GameState):
+    def display(self, state: CompactState):
         """Devolve a grelha em modo txt"""
-        return str(state.board)
\ No newline at end of file
+        return str(self.game_state(state).board)
\ No newline at end of file
@@ -0,0 +1,506 @@
+"""Parallel searchers: the searches of searchPlus spread over several local processes.
+
+They take the same problems as searchPlus (the problem is copied into every
+worker process, so it must be picklable when processes are not forked) and
+return the same results as their sequential counterparts."""
+
+import functools
+import heapq
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import time
+import traceback
+from itertools import count as counter
+
+from problem.searchPlus import Problem, Node, _replay
+
+infinity = float('inf')
+
+# nodes a worker explores between two looks for idle workers to feed
+SPLIT_INTERVAL = 256
+
+# children sent to another worker at once, and nodes expanded between two flushes of every batch
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 256
+
+# seconds the parent waits for a report before it looks for dead workers
+POLL_INTERVAL = 0.1
+
+# ______________________________________________________________________________
+# Worker failures
+
+
+class _RemoteTraceback(Exception):
+    """ Traceback of an exception raised in a worker, shown as the cause of the exception re-raised """
+    def __init__(self, trace: str) -> None:
+        super().__init__(trace)
+        self.trace = trace
+
+    def __str__(self) -> str:
+        return self.trace
+
+
+class _Failure:
+    """ What a worker puts on the results queue instead of its report when it raises """
+    def __init__(self, error: BaseException, trace: str) -> None:
+        try:
+            pickle.dumps(error)
+        except Exception:
+            error = RuntimeError(repr(error))
+        self.error = error
+        self.trace = trace
+
+    def reraise(self):
+        raise self.error from _RemoteTraceback(self.trace)
+
+
+def _guarded(body, results, *args) -> None:
+    """ Run body(*args, results) in a worker, sending any exception it raises to the parent through results """
+    try:
+        body(*args, results)
+    except BaseException as error:
+        results.put(_Failure(error, traceback.format_exc()))
+
+
+def _check(processes: list) -> None:
+    """ Fail if a worker died without a report (killed, or its interpreter crashed) """
+    for process in processes:
+        if process.exitcode not in (None, 0):
+            raise RuntimeError(f"worker process {process.pid} died with exit code {process.exitcode}")
+
+
+def _stop(processes: list) -> None:
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join()
+
+
+def _gather(results, processes: list) -> list:
+    """
+    One report per worker process, waiting POLL_INTERVAL seconds at a time and looking for dead workers in
+    between. When a worker raised, its exception is re-raised here; when a worker died, RuntimeError is. Either
+    way the other workers are terminated first, since they would wait forever for the missing one.
+    """
+    reports = []
+    try:
+        while len(reports) < len(processes):
+            try:
+                report = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                _check(processes)
+                continue
+            if isinstance(report, _Failure):
+                report.reraise()
+            reports.append(report)
+    except BaseException:
+        _stop(processes)
+        raise
+    for process in processes:
+        process.join()
+    return reports
+
+# ______________________________________________________________________________
+# Work-stealing branch and bound
+
+
+def _order(ranks: list) -> tuple:
+    """Position in which the sequential depth first search meets a goal, from the ranks of the actions of its
+    path: goals are found when their parent is expanded, parents are expanded in preorder (a prefix first,
+    then by action rank) and siblings come by action rank."""
+    return (tuple(ranks[:-1]), ranks[-1])
+
+
+class _BranchAndBoundWorker:
+    """
+    One process of parallel_depth_first_tree_search. It explores the subtree below a task (the actions and
+    their ranks from the initial state) depth first on one mutable state, exactly like
+    _depth_first_tree_search_inplace, and when other workers are idle it gives them the subtrees it would
+    explore last, the closest to its task root first.
+
+    The best cost found by any worker lives in shared memory and bounds every worker; a goal as cheap as the
+    bound is still kept when the sequential search would have met it first, so the best solution is the same.
+    """
+    def __init__(self, problem: Problem, optimize: bool, tasks, shared: tuple) -> None:
+        self.problem = problem
+        self.optimize = optimize
+        self.tasks = tasks
+        self.incumbent, self.incumbent_lock, self.outstanding, self.idle = shared
+        self.n_visited_states = 0
+        self.n_final_states = 0
+        self.max_frontier_len = 0
+        self.best = None  # (cost, order, actions)
+
+    def run(self, results) -> None:
+        while True:
+            task = self.next_task()
+            if task is None:
+                break
+            self.explore(*task)
+            with self.outstanding.get_lock():
+                self.outstanding.value -= 1
+        results.put((self.max_frontier_len, self.n_visited_states, self.n_final_states, self.best))
+
+    def next_task(self):
+        """ The next task, or None once no worker has a task left (so none can give one) """
+        with self.idle.get_lock():
+            self.idle.value += 1
+        try:
+            while True:
+                try:
+                    return self.tasks.get(timeout=0.005)
+                except queue.Empty:
+                    if self.outstanding.value == 0:
+                        return None
+        finally:
+            with self.idle.get_lock():
+                self.idle.value -= 1
+
+    def give(self, actions: list, ranks: list) -> None:
+        with self.outstanding.get_lock():
+            self.outstanding.value += 1
+        self.tasks.put((actions, ranks))
+
+    def bound(self):
+        bound = self.incumbent.value
+        if self.best is not None and self.best[0] < bound:
+            bound = self.best[0]
+        return bound
+
+    def record(self, cost, actions: list, ranks: list) -> bool:
+        """ A goal reached at cost: keep it if it beats the best of this worker (cost first, then order) """
+        candidate = (cost, _order(ranks), actions)
+        if self.best is not None and candidate[:2] >= self.best[:2]:
+            return False
+        self.best = candidate
+        if cost < self.incumbent.value:
+            with self.incumbent_lock:
+                if cost < self.incumbent.value:
+                    self.incumbent.value = cost
+        return True
+
+    def successors(self, state, path: list, ranks: list, cost) -> list:
+        """ (action, cost, goal, rank) of the successors of state to explore, last to explore first """
+        problem = self.problem
+        bound = self.bound()
+        children = []
+        for rank, action in enumerate(problem.actions(state)):
+            child_cost = cost + problem.apply(state, action)
+            goal = problem.goal_test(state)
+            problem.undo(state)
+
+            kept = goal and child_cost <= bound and self.record(child_cost, path + [action], ranks + [rank])
+            if kept:
+                bound = self.bound()
+            # a goal as cheap as the bound of another worker may still come first; anything below it costs more
+            if self.optimize and (child_cost > bound or (child_cost == bound and not kept)):
+                continue
+            children.append((action, child_cost, goal, rank))
+        children.reverse()
+        return children
+
+    def split(self, frames: list, path: list, ranks: list, depth: int) -> int:
+        """ Give one subtree to every idle worker; return how many non goal successors were given away """
+        wanted = self.idle.value
+        given = 0
+        for level, frame in enumerate(frames):
+            # frame[0] is the successor this worker would explore last
+            while given < wanted and frame:
+                action, _, goal, rank = frame[0]
+                if goal:
+                    break
+                del frame[0]
+                self.give(path[:depth + level] + [action], ranks[:depth + level] + [rank])
+                given += 1
+        return given
+
+    def explore(self, actions: list, ranks: list) -> None:
+        problem = self.problem
+        state = problem.mutable()
+        cost = 0
+        for action in actions:
+            cost += problem.apply(state, action)
+
+        self.n_visited_states += 1
+        if problem.goal_test(state):
+            self.n_final_states += 1
+            return
+
+        path, path_ranks = list(actions), list(ranks)
+        depth = len(path)
+        frames = [self.successors(state, path, path_ranks, cost)]
+        pending = sum(1 for _, _, goal, _ in frames[0] if not goal)
+        self.max_frontier_len = max(self.max_frontier_len, 1)
+        explored = 0
+
+        while frames:
+            frame = frames[-1]
+            if not frame:
+                frames.pop()
+                if len(path) > depth:
+                    path.pop()
+                    path_ranks.pop()
+                    problem.undo(state)
+                continue
+
+            explored += 1
+            if explored % SPLIT_INTERVAL == 0 and self.idle.value:
+                pending -= self.split(frames, path, path_ranks, depth)
+                if not frame:
+                    continue
+
+            self.max_frontier_len = max(self.max_frontier_len, pending)
+            action, cost, goal, rank = frame.pop()
+            self.n_visited_states += 1
+            if goal:
+                self.n_final_states += 1
+                continue
+
+            pending -= 1
+            problem.apply(state, action)
+            path.append(action)
+            path_ranks.append(rank)
+            children = self.successors(state, path, path_ranks, cost)
+            pending += sum(1 for _, _, goal, _ in children if not goal)
+            frames.append(children)
+
+
+def _branch_and_bound_worker(problem: Problem, optimize: bool, tasks, shared: tuple, results) -> None:
+    _BranchAndBoundWorker(problem, optimize, tasks, shared).run(results)
+
+
+def parallel_depth_first_tree_search(problem: Problem, optimal: bool = False, workers: int = None) -> tuple:
+    """
+    depth_first_tree_search_inplace on several processes (os.cpu_count() by default), returning the same
+    (best_solution, max_frontier_len, n_visited_states, n_final_states) tuple. The problem must provide
+    mutable, apply and undo (see _depth_first_tree_search_inplace). Like it, it does not prune dominated
+    nodes, even for a problem with a dominance_key.
+
+    The best solution is the one of depth_first_tree_search_inplace. Without optimal every node of the tree is visited,
+    so n_visited_states and n_final_states are the sequential ones too; with optimal, how much gets pruned
+    depends on when each worker learns of the best cost, and the counts vary from run to run. max_frontier_len
+    is the largest frontier of any single worker. An exception raised in a worker is raised again here, and
+    RuntimeError is raised if a worker dies.
+    """
+    if problem.goal_test(problem.mutable()):
+        return (None, 0, 1, 1)
+
+    workers = workers or os.cpu_count() or 1
+    tasks = mp.Queue()
+    results = mp.Queue()
+    shared = (mp.RawValue('d', infinity), mp.Lock(), mp.Value('i', 1), mp.Value('i', 0))
+    tasks.put(([], []))
+
+    processes = [
+        mp.Process(target=_guarded, args=(_branch_and_bound_worker, results, problem, optimal, tasks, shared))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = _gather(results, processes)
+
+    max_frontier_len = max(report[0] for report in reports)
+    n_visited_states = sum(report[1] for report in reports)
+    n_final_states = sum(report[2] for report in reports)
+    bests = [report[3] for report in reports if report[3] is not None]
+    best_solution = _replay(problem, min(bests, key=lambda best: best[:2])[2]) if bests else None
+    return (best_solution, max_frontier_len, n_visited_states, n_final_states)
+
+# ______________________________________________________________________________
+# Hash distributed best first search (HDA*)
+
+
+class _BestFirstWorker:
+    """
+    One process of parallel_best_first_graph_search. The worker owns the states whose hash modulo the number
+    of workers is its index: it keeps their frontier and the best path cost reached for each of them, so the
+    explored set is split between the workers without any locking. Children owned by another worker are sent
+    to it, with their path cost and the actions that reach them, in batches.
+
+    A goal is recognised when it is generated; its cost, if lower, becomes the shared bound U, and nodes whose
+    f is not below U are neither expanded nor kept. A worker is passive when it has nothing left below U and
+    nothing left to send.
+    """
+    def __init__(self, problem: Problem, f, index: int, inboxes: list, shared: tuple) -> None:
+        self.problem = problem
+        self.f = f
+        self.index = index
+        self.inboxes = inboxes
+        self.bound, self.bound_lock, self.sent, self.received, self.passive, self.done = shared
+        self.frontier = []
+        self.reached = {}
+        self.tie = counter()
+        self.outboxes = [[] for _ in inboxes]
+        self.expanded = 0
+        self.best = None  # (cost, actions)
+
+    def owner(self, state) -> int:
+        return hash(state) % len(self.inboxes)
+
+    def add(self, state, path_cost, actions: tuple) -> None:
+        """ A path to a state this worker owns """
+        if self.reached.get(state, path_cost + 1) <= path_cost:
+            return
+        self.reached[state] = path_cost
+        value = self.f(Node(state, None, actions[-1] if actions else None, path_cost))
+        if value < self.bound.value:
+            heapq.heappush(self.frontier, (value, next(self.tie), path_cost, state, actions))
+
+    def send(self, owner: int) -> None:
+        batch = self.outboxes[owner]
+        if batch:
+            self.outboxes[owner] = []
+            self.sent[self.index] += 1
+            self.inboxes[owner].put(batch)
+
+    def flush(self) -> None:
+        for owner in range(len(self.outboxes)):
+            self.send(owner)
+
+    def receive(self, batch: list) -> None:
+        self.passive[self.index] = 0
+        self.received[self.index] += 1
+        for state, path_cost, actions in batch:
+            self.add(state, path_cost, actions)
+
+    def record(self, path_cost, actions: tuple) -> None:
+        if self.best is None or path_cost < self.best[0]:
+            self.best = (path_cost, actions)
+        if path_cost < self.bound.value:
+            with self.bound_lock:
+                if path_cost < self.bound.value:
+                    self.bound.value = path_cost
+
+    def expand(self) -> None:
+        value, _, path_cost, state, actions = heapq.heappop(self.frontier)
+        if path_cost > self.reached[state] or value >= self.bound.value:
+            return
+        self.expanded += 1
+        for child in Node(state, None, None, path_cost).expand(self.problem):
+            child_actions = actions + (child.action,)
+            if self.problem.goal_test(child.state):
+                self.record(child.path_cost, child_actions)
+                continue
+            owner = self.owner(child.state)
+            if owner == self.index:
+                self.add(child.state, child.path_cost, child_actions)
+            else:
+                self.outboxes[owner].append((child.state, child.path_cost, child_actions))
+                if len(self.outboxes[owner]) >= BATCH_SIZE:
+                    self.send(owner)
+
+    def run(self, results) -> None:
+        inbox = self.inboxes[self.index]
+        while not self.done.value:
+            try:
+                while True:
+                    self.receive(inbox.get_nowait())
+            except queue.Empty:
+                pass
+
+            if self.frontier and self.frontier[0][0] < self.bound.value:
+                self.expand()
+                if self.expanded % FLUSH_INTERVAL == 0:
+                    self.flush()
+                continue
+
+            self.frontier = []
+            self.flush()
+            self.passive[self.index] = 1
+            try:
+                self.receive(inbox.get(timeout=0.005))
+            except queue.Empty:
+                pass
+        results.put((self.expanded, self.best))
+
+
+def _best_first_worker(problem: Problem, f, index: int, inboxes: list, shared: tuple, results) -> None:
+    _BestFirstWorker(problem, f, index, inboxes, shared).run(results)
+
+
+def _terminated(shared: tuple) -> bool:
+    """ Two consecutive looks at the workers find them all passive with every batch sent received """
+    _, _, sent, received, passive, _ = shared
+    waves = []
+    for _ in range(2):
+        waves.append((all(passive), sum(sent), sum(received)))
+        time.sleep(0.002)
+    (passive1, sent1, received1), (passive2, sent2, received2) = waves
+    return passive1 and passive2 and sent1 == received1 == sent2 == received2
+
+
+def parallel_best_first_graph_search_count(problem: Problem, f, workers: int = None) -> tuple:
+    """
+    best_first_graph_search_count on several processes (os.cpu_count() by default), HDA* style: every state
+    is owned by the worker hash(state) % workers, so states must hash the same in every process (the Zobrist
+    keys of PacmanProblem do; hash randomised strings only do in forked processes). f must be picklable when
+    processes are not forked.
+
+    The search stops once every worker has nothing left with f below the cost U of the best goal found and
+    no batch is in flight; with an admissible f the solution returned is then optimal. Returns the goal node
+    (rebuilt from the initial state) or None, and the number of nodes expanded by all the workers. An exception
+    raised in a worker is raised again here, and RuntimeError is raised if a worker dies.
+    """
+    node = Node(problem.initial)
+    if problem.goal_test(node.state):
+        return (node, 0)
+
+    workers = workers or os.cpu_count() or 1
+    inboxes = [mp.Queue() for _ in range(workers)]
+    results = mp.Queue()
+    shared = (
+        mp.RawValue('d', infinity), mp.Lock(),
+        mp.Array('q', workers), mp.Array('q', workers), mp.Array('b', workers), mp.Value('b', 0)
+    )
+    _, _, sent, _, _, done = shared
+    sent[0] = 1
+    inboxes[hash(node.state) % workers].put([(node.state, 0, ())])
+
+    processes = [
+        mp.Process(target=_guarded, args=(_best_first_worker, results, problem, f, index, inboxes, shared))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        while not _terminated(shared):
+            # workers only report once done is set: anything earlier is a failure
+            try:
+                results.get_nowait().reraise()
+            except queue.Empty:
+                _check(processes)
+    except BaseException:
+        _stop(processes)
+        raise
+    done.value = 1
+    reports = _gather(results, processes)
+
+    expanded = sum(report[0] for report in reports)
+    bests = [report[1] for report in reports if report[1] is not None]
+    if not bests:
+        return (None, expanded)
+    return (_replay(problem, min(bests, key=lambda best: best[0])[1]), expanded)
+
+
+def parallel_best_first_graph_search(problem: Problem, f, workers: int = None):
+    return parallel_best_first_graph_search_count(problem, f, workers)[0]
+
+
+def _path_cost(node: Node):
+    return node.path_cost
+
+
+def _astar_cost(h, node: Node):
+    return node.path_cost + h(node)
+
+
+def parallel_uniform_cost_search(problem: Problem, workers: int = None):
+    return parallel_best_first_graph_search(problem, _path_cost, workers)
+
+
+def parallel_astar_search(problem: Problem, h=None, workers: int = None):
+    """A* on several processes; h defaults to problem.h, as in astar_search."""
+    return parallel_best_first_graph_search(problem, functools.partial(_astar_cost, h or problem.h), workers)
@@ -0,0 +1,178 @@
+"""Portfolio solver: several searchers of searchPlus racing on the same problem.
+
+Which searcher is fastest on a problem depends on the problem itself, so the
+portfolio runs several engines in separate processes under one deadline and
+takes the first answer proven optimal, cancelling the others; when the
+deadline comes first, the cheapest answer reported so far is returned.
+Engines are started in order, at most `workers` at a time, and every race can
+be recorded in a JSON file of per engine statistics from which the next races
+learn their order (the engines that win most, and fastest, first)."""
+
+import json
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import namedtuple
+
+from problem.searchPlus import (
+    Problem, depth_first_tree_search_all_count, seed_incumbent, uniform_cost_search, astar_search,
+    iterative_deepening_astar_search, anytime_depth_first_search
+)
+
+# seconds the race waits for a result before it looks for engines that died without a word
+POLL_INTERVAL = 0.1
+
+Outcome = namedtuple("Outcome", "engine cost actions optimal elapsed")
+Outcome.__doc__ = """Answer of a portfolio race: the engine that gave it, its cost and actions (None when no engine
+found a solution), whether it is proven optimal and the seconds elapsed when it was reported."""
+
+# ______________________________________________________________________________
+# Engines: engine(problem, report) calls report(node, optimal) with every solution it finds
+
+
+def _depth_first(problem: Problem, report) -> None:
+    incumbent = seed_incumbent(problem)
+    if incumbent is not None:
+        report(incumbent, False)
+    report(depth_first_tree_search_all_count(problem, True, incumbent=incumbent)[0], True)
+
+
+def _uniform_cost(problem: Problem, report) -> None:
+    report(uniform_cost_search(problem), True)
+
+
+def _astar(problem: Problem, report) -> None:
+    report(astar_search(problem), True)
+
+
+def _ida_star(problem: Problem, report) -> None:
+    report(iterative_deepening_astar_search(problem), True)
+
+
+def _anytime(problem: Problem, report) -> None:
+    for incumbent in anytime_depth_first_search(problem):
+        if incumbent.cost is not None:
+            report(incumbent, incumbent.gap == 0)
+
+
+engines = {
+    "depth_first": _depth_first,
+    "uniform_cost": _uniform_cost,
+    "astar": _astar,
+    "ida_star": _ida_star,
+    "anytime": _anytime
+}
+
+# ______________________________________________________________________________
+
+
+def _run(name: str, problem: Problem, results: mp.Queue, start: float) -> None:
+    """ Body of an engine process: every solution goes to results as (name, cost, actions, optimal, elapsed) """
+    def report(solution, optimal):
+        if solution is None:
+            return
+        if hasattr(solution, "solution"):
+            cost, actions = solution.path_cost, solution.solution()
+        else:
+            cost, actions = solution.cost, solution.actions
+        results.put((name, cost, actions, optimal, time.perf_counter() - start))
+
+    try:
+        engines[name](problem, report)
+    finally:
+        results.put((name, None, None, None, time.perf_counter() - start))
+
+
+def load_stats(path: str) -> dict:
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_stats(path: str, stats: dict) -> None:
+    with open(path, "w") as file:
+        json.dump(stats, file, indent=1, sort_keys=True)
+
+
+def default_order(stats: dict, key: str = "default", names: list = None) -> list:
+    """ Engines (of names, all of them by default) by decreasing wins under key, then by mean winning time """
+    names = list(names or engines)
+    records = stats.get(key, {})
+
+    def rank(name):
+        record = records.get(name)
+        if not record or not record["wins"]:
+            return (0, 0.0)
+        return (-record["wins"], record["seconds"] / record["wins"])
+    return sorted(names, key=rank)
+
+
+def portfolio_search(problem: Problem, names: list = None, deadline: float = None, workers: int = None,
+                     stats: str = None, key: str = "default") -> Outcome:
+    """
+    Race the engines names (all of them by default, in the order learned from stats) on problem, at most workers
+    processes at a time (os.cpu_count() by default), the next engine starting when one finishes. The first
+    answer proven optimal wins and cancels every other engine; after deadline seconds the cheapest answer so
+    far is returned unproven. An engine whose process dies counts as finished, without an answer. stats is the
+    path of the JSON statistics file, updated under key (for instance a description of the problem, as the best
+    engine differs from one kind of problem to another).
+    """
+    start = time.perf_counter()
+    records = load_stats(stats)
+    pending = default_order(records, key, names) if stats else list(names or engines)
+    workers = workers or os.cpu_count() or 1
+    results = mp.Queue()
+    running = {}
+    best = Outcome(None, None, None, False, None)
+
+    def launch():
+        while pending and len(running) < workers:
+            name = pending.pop(0)
+            running[name] = mp.Process(target=_run, args=(name, problem, results, start), daemon=True)
+            running[name].start()
+
+    launch()
+    try:
+        while running:
+            timeout = None if deadline is None else deadline - (time.perf_counter() - start)
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                name, cost, actions, optimal, elapsed = results.get(
+                    timeout=POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL)
+                )
+            except queue.Empty:
+                # an engine killed before its finally (out of memory, a crash, os._exit) never says it is done
+                for name in [name for name, process in running.items() if process.exitcode is not None]:
+                    running.pop(name).join()
+                launch()
+                continue
+            if cost is None:
+                if name in running:
+                    running.pop(name).join()
+                    launch()
+                continue
+            if best.cost is None or cost < best.cost or optimal and cost == best.cost:
+                best = Outcome(name, cost, actions, optimal, elapsed)
+            if optimal:
+                break
+    finally:
+        # cancel the losers
+        for process in running.values():
+            process.terminate()
+        for process in running.values():
+            process.join()
+
+    if stats:
+        table = records.setdefault(key, {})
+        for name in names or engines:
+            table.setdefault(name, {"runs": 0, "wins": 0, "seconds": 0.0})
+        for name in set(names or engines) - set(pending):
+            table[name]["runs"] += 1
+        if best.optimal:
+            table[best.engine]["wins"] += 1
+            table[best.engine]["seconds"] += best.elapsed
+        save_stats(stats, records)
+    return best
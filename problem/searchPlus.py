@@ -6,15 +6,19 @@ functions."""
 
 from problem.utils import (
     is_in, argmin, argmax, argmax_random_tie, probability, weighted_sampler,
-    memoize, print_table, open_data, Stack, FIFOQueue, PriorityQueue, name,
+    memoize, print_table, open_data, Stack, FIFOQueue, PriorityQueue, IndexedQueue, name,
     distance
 )
 
-from collections import defaultdict
+from array import array
+from collections import defaultdict, namedtuple
+from itertools import count
+import heapq
 import math
 import random
 import sys
 import bisect
+import time
 
 infinity = float('inf')
 
@@ -26,7 +30,13 @@ class Problem(object):
     """The abstract class for a formal problem.  You should subclass
     this and implement the methods actions and result, and possibly
     __init__, goal_test, and path_cost. Then you will create instances
-    of your subclass and solve them with the various search functions."""
+    of your subclass and solve them with the various search functions.
+
+    A subclass may also define successors(state), yielding the
+    (action, next_state, step_cost) of every action of state in one pass,
+    where step_cost is path_cost(c, state, action, next_state) - c. The
+    searchers then use it instead of calling actions, result and path_cost
+    for every child (see successors below)."""
 
     def __init__(self, initial, goal=None):
         """The constructor specifies the initial state, and possibly a goal
@@ -70,6 +80,24 @@ class Problem(object):
         """For optimization problems, each state has a value.  Hill-climbing
         and related algorithms try to maximize this value."""
         raise NotImplementedError
+
+    def count_key(self, state):
+        """Return a key such that states with equal keys have search trees of
+        the same shape below them (same actions, same goals). count_tree_search
+        memoizes on it; the default key is the state itself."""
+        return state
+
+    def dominance_key(self, state):
+        """Return the key of the group of states that dominates can compare
+        with one another, or None to disable dominance pruning (the default)."""
+        return None
+
+    def dominates(self, state1, cost1, state2, cost2):
+        """Return True if state1 reached at cost1 is at least as good as state2
+        reached at cost2: every continuation of state2 is possible from state1
+        and costs no more from there (so cost1 <= cost2). Only called on states
+        with the same dominance_key."""
+        return False
         
 # ______________________________________________________________________________
 
@@ -103,9 +131,27 @@ class Node:
 
     def expand(self, problem):
         """List the nodes reachable in one step from this node."""
+        if hasattr(problem, "successors"):
+            return [Node(next, self, action, self.path_cost + cost)
+                    for action, next, cost in problem.successors(self.state)]
         return [self.child_node(problem, action)
                 for action in problem.actions(self.state)]
 
+    def iter_children(self, problem, actions=None):
+        """Like expand, but lazily: each child is only built when the
+        generator is advanced to it. actions (problem.actions by default)
+        sets which children come, and in which order. problem.successors
+        is only used when actions is not given: an explicit (for instance
+        ordered) list is expanded one action at a time by child_node."""
+        if actions is None:
+            if hasattr(problem, "successors"):
+                for action, next, cost in problem.successors(self.state):
+                    yield Node(next, self, action, self.path_cost + cost)
+                return
+            actions = problem.actions(self.state)
+        for action in actions:
+            yield self.child_node(problem, action)
+
     def child_node(self, problem, action):
         """[Figure 3.10]"""
         next = problem.result(self.state, action)
@@ -138,6 +184,86 @@ class Node:
 
 # ______________________________________________________________________________
 
+
+def successors(problem, state):
+    """(action, next_state, step_cost) of every action of state: problem.successors(state) when the problem
+    defines it, else built from actions, result and path_cost."""
+    if hasattr(problem, "successors"):
+        return problem.successors(state)
+    return ((action, next, problem.path_cost(0, state, action, next))
+            for action, next in ((action, problem.result(state, action)) for action in problem.actions(state)))
+
+
+class NodeArena:
+    """
+    Search nodes stored column-wise, in parallel arrays, instead of one Node object each: node i is the i-th
+    entry of parents (index of its parent, -1 for a root), codes (its action, as a byte indexing actions),
+    costs (its path cost) and depths. A node then takes 21 bytes, whatever its state.
+
+    States are kept in a side table only for the nodes a searcher passes one for, until it forgets them;
+    state(i) otherwise replays the actions of node i from the initial state. Solutions are rebuilt from the
+    parent indices, and node(i) replays them into the usual chain of Nodes.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.parents = array('q')
+        self.codes = array('B')
+        self.costs = array('d')
+        self.depths = array('I')
+        self.actions = [None]
+        self.codes_of = {None: 0}
+        self.states = {}
+
+    def add(self, parent, action, path_cost, state=None):
+        """Store a new node and return its index; state, if given, is kept in the side table."""
+        code = self.codes_of.get(action)
+        if code is None:
+            if len(self.actions) == 256:
+                raise OverflowError("NodeArena stores at most 255 distinct actions")
+            code = self.codes_of[action] = len(self.actions)
+            self.actions.append(action)
+        index = len(self.parents)
+        self.parents.append(parent)
+        self.codes.append(code)
+        self.costs.append(path_cost)
+        self.depths.append(self.depths[parent] + 1 if parent >= 0 else 0)
+        if state is not None:
+            self.states[index] = state
+        return index
+
+    def solution(self, index):
+        """The sequence of actions from the root to node index."""
+        actions = []
+        while self.parents[index] >= 0:
+            actions.append(self.actions[self.codes[index]])
+            index = self.parents[index]
+        actions.reverse()
+        return actions
+
+    def state(self, index):
+        state = self.states.get(index)
+        if state is None:
+            state = self.problem.initial
+            for action in self.solution(index):
+                state = self.problem.result(state, action)
+        return state
+
+    def forget(self, index):
+        """Drop the state of node index from the side table."""
+        self.states.pop(index, None)
+
+    def node(self, index):
+        """Node index as a Node, with its parents."""
+        return _replay(self.problem, self.solution(index))
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in (self.parents, self.codes, self.costs, self.depths))
+
+    def __len__(self):
+        return len(self.parents)
+
+# ______________________________________________________________________________
+
 def is_useful(current_best: Node, competitor: Node) -> bool:
     """ Given two nodes, return true if the competitor is still useful to expand. False otherwise. """
     return not current_best or competitor.path_cost < current_best.path_cost
@@ -183,6 +309,43 @@ def nonGoal(frontier: list) -> list:
     """ return list of nodes in frontier that are not in final state (goal) """
     return [node for node in frontier if not node.goal]
 
+
+class DominanceIndex:
+    """
+    The (path cost, state) of the nodes generated so far, in buckets by problem.dominance_key, so that a
+    searcher can drop a new node some other node dominates (see Problem.dominates) instead of expanding it.
+
+    A dominating node is never more expensive, so the buckets are kept sorted by cost: a new node is only
+    compared with the cheaper nodes of its bucket, and then removes the more expensive nodes it dominates.
+    """
+    def __init__(self, problem: Problem, capacity: int = 8) -> None:
+        self.problem = problem
+        self.capacity = capacity
+        self.buckets = defaultdict(list)
+
+    def dominated(self, node: Node) -> bool:
+        """ True if an indexed node dominates node; otherwise node is indexed and False returned """
+        key = self.problem.dominance_key(node.state)
+        if key is None:
+            return False
+
+        dominates = self.problem.dominates
+        state, cost = node.state, node.path_cost
+        bucket = self.buckets[key]
+        position = bisect.bisect_right(bucket, cost, key=lambda entry: entry[0])
+        for other_cost, other in bucket[:position]:
+            if dominates(other, other_cost, state, cost):
+                return True
+
+        position = bisect.bisect_left(bucket, cost, key=lambda entry: entry[0])
+        bucket[position:] = [(cost, state)] + [
+            (other_cost, other) for other_cost, other in bucket[position:]
+            if not dominates(state, cost, other, other_cost)
+        ]
+        del bucket[self.capacity:]
+        return False
+
+
 # ______________________________________________________________________________
 
 class SimpleProblemSolvingAgentProgram:
@@ -237,44 +400,42 @@ def tree_search(problem, frontier):
     return None
 
 
-def graph_search(problem, frontier):
-    """Search through the successors of a problem to find a goal.
-    The argument frontier should be an empty queue.
-    If two paths reach a state, only use the first one. [Figure 3.7]"""
+def _graph_search(problem, frontier, verbose=False):
+    """Core of graph_search and graph_search_count. Returns the goal node (or
+    None) and the number of expanded nodes. The explored states are kept in a
+    set and the frontier is indexed, so both duplicate checks are O(1)."""
+    frontier = IndexedQueue(frontier)
     frontier.append(Node(problem.initial))
-    explored = list()
+    explored = set()
+    expanded = 0
     while frontier:
         node = frontier.pop()
+        if verbose:
+            print(node.state)
+        expanded += 1
         if problem.goal_test(node.state):
-            return node
-        zz = []
-        #explored.append(node.state)
-        explored = explored + [node.state]
+            return node, expanded
+        explored.add(node.state)
         frontier.extend(child for child in node.expand(problem)
                         if child.state not in explored and
                         child not in frontier)
-    return None
+    return None, expanded
+
 
-def graph_search_count(problem, frontier):
+def graph_search(problem, frontier):
     """Search through the successors of a problem to find a goal.
     The argument frontier should be an empty queue.
     If two paths reach a state, only use the first one. [Figure 3.7]"""
-    expandidos=0
-    frontier.append(Node(problem.initial))
-    explored = list()
-    while frontier:
-        node = frontier.pop()
-        print(node.state)  # temp
-        expandidos+=1
-        if problem.goal_test(node.state):
-            return (node,expandidos)
-        zz = []
-        #explored.append(node.state)
-        explored = explored + [node.state]
-        frontier.extend(child for child in node.expand(problem)
-                        if child.state not in explored and
-                        child not in frontier)
-    return (None,expandidos)
+    node, _ = _graph_search(problem, frontier)
+    return node
+
+def graph_search_count(problem, frontier, verbose=False):
+    """Search through the successors of a problem to find a goal.
+    The argument frontier should be an empty queue.
+    If two paths reach a state, only use the first one. [Figure 3.7]
+    Returns the goal node and the number of expanded nodes; with verbose,
+    every expanded state is printed."""
+    return _graph_search(problem, frontier, verbose)
 
 def breadth_first_tree_search(problem):
     """Search the shallowest nodes in the search tree first."""
@@ -290,9 +451,9 @@ def depth_first_graph_search(problem):
     """Search the deepest nodes in the search tree first."""
     return graph_search(problem, Stack())
 
-def depth_first_graph_search_count(problem):
+def depth_first_graph_search_count(problem, verbose=False):
     """Search the deepest nodes in the search tree first."""
-    return graph_search_count(problem, Stack())
+    return graph_search_count(problem, Stack(), verbose)
 
 
 def breadth_first_search(problem):
@@ -300,7 +461,7 @@ def breadth_first_search(problem):
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = FIFOQueue()
+    frontier = IndexedQueue(FIFOQueue())
     frontier.append(node)
     explored = set()
     while frontier:
@@ -319,7 +480,7 @@ def breadth_first_search_count(problem):
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return 0,node
-    frontier = FIFOQueue()
+    frontier = IndexedQueue(FIFOQueue())
     frontier.append(node)
     explored = set()
     while frontier:
@@ -346,21 +507,24 @@ def best_first_graph_search(problem, f):
     if problem.goal_test(node.state):
         return node
     frontier = PriorityQueue(min, f)
+    dominance = DominanceIndex(problem)
+    dominance.dominated(node)
     frontier.append(node)
-    explored = list()
+    explored = set()
     while frontier:
         node = frontier.pop()
         if problem.goal_test(node.state):
             return node
-        explored.append(node.state)
+        explored.add(node.state)
         for child in node.expand(problem):
             if child.state not in explored and child not in frontier:
+                if dominance.dominated(child):
+                    continue
                 frontier.append(child)
             elif child in frontier:
                 incumbent = frontier[child]
                 if f(child) < f(incumbent):
-                    del frontier[incumbent]
-                    frontier.append(child)
+                    frontier.decrease_key(child)
     return None
 
 def best_first_graph_search_count(problem, f):
@@ -374,26 +538,29 @@ def best_first_graph_search_count(problem, f):
     f = memoize(f, 'f')
     node = Node(problem.initial)
     if problem.goal_test(node.state):
-        return (node,len(explored))
+        return (node,0)
     frontier = PriorityQueue(min, f)
+    dominance = DominanceIndex(problem)
+    dominance.dominated(node)
     frontier.append(node)
-    explored = list()
+    explored = set()
     while frontier:
         node = frontier.pop()
         #print('Testo se é objectivo, com custo',node.path_cost)
         #print(node.state)
         if problem.goal_test(node.state):
             return (node,len(explored))
-        explored.append(node.state)
+        explored.add(node.state)
         for child in node.expand(problem):
             if child.state not in explored and child not in frontier:
                 #print('Sucessor com custo',child.path_cost)
+                if dominance.dominated(child):
+                    continue
                 frontier.append(child)
             elif child in frontier:
                 incumbent = frontier[child]
                 if f(child) < f(incumbent):
-                    del frontier[incumbent]
-                    frontier.append(child)
+                    frontier.decrease_key(child)
     return (None,len(explored))
 
 def uniform_cost_search(problem):
@@ -406,24 +573,29 @@ def uniform_cost_search_count(problem):
     return best_first_graph_search_count(problem, lambda node: node.path_cost)
 
 def depth_limited_search(problem, limit=50):
-    """[Figure 3.17]"""
-    def recursive_dls(node, problem, limit):
-        if problem.goal_test(node.state):
-            return node
-        elif limit == 0:
-            return 'cutoff'
+    """[Figure 3.17], with an explicit stack of successor iterators instead of
+    one recursive call per ply, so the limit is not bounded by the recursion
+    limit. Returns the goal node, 'cutoff' when the limit cut some path and no
+    goal was found, or None."""
+    root = Node(problem.initial)
+    if problem.goal_test(root.state):
+        return root
+    if limit == 0:
+        return 'cutoff'
+
+    cutoff_occurred = False
+    stack = [iter(root.expand(problem))]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+        elif problem.goal_test(child.state):
+            return child
+        elif child.depth == limit:
+            cutoff_occurred = True
         else:
-            cutoff_occurred = False
-            for child in node.expand(problem):
-                result = recursive_dls(child, problem, limit - 1)
-                if result == 'cutoff':
-                    cutoff_occurred = True
-                elif result is not None:
-                    return result
-            return 'cutoff' if cutoff_occurred else None
-
-    # Body of depth_limited_search:
-    return recursive_dls(Node(problem.initial), problem, limit)
+            stack.append(iter(child.expand(problem)))
+    return 'cutoff' if cutoff_occurred else None
 
 
 def iterative_deepening_search(problem):
@@ -433,12 +605,63 @@ def iterative_deepening_search(problem):
         if result != 'cutoff':
             return result
 
-def _depth_first_tree_search_all_count(problem: Problem, frontier: list, optimize: bool = False, verbose: bool = False) -> tuple:
+
+def iterative_deepening_astar_search(problem, h=None, table_size=0):
+    """IDA*: depth first passes bounded by f = g + h (h defaults to
+    problem.h), with an explicit stack. Each pass records the lowest f above
+    its threshold, which is the threshold of the next pass.
+
+    With table_size > 0, a transposition table of up to table_size states is
+    kept between passes: when the subtree of a state reached at cost g fails,
+    the lowest f above the threshold found in it, minus g, is a lower bound of
+    the cost left from that state, and it replaces h when larger."""
+    h = h or problem.h
+    learned = {} if table_size > 0 else None
+
+    def f(node):
+        estimate = h(node)
+        if learned:
+            estimate = max(estimate, learned.get(node.state, estimate))
+        return node.path_cost + estimate
+
+    root = Node(problem.initial)
+    if problem.goal_test(root.state):
+        return root
+
+    threshold = f(root)
+    while threshold < infinity:
+        # frames of [node, successors left, lowest f above the threshold below node]
+        stack = [[root, iter(root.expand(problem)), infinity]]
+        while stack:
+            frame = stack[-1]
+            child = next(frame[1], None)
+            if child is None:
+                stack.pop()
+                node, _, lowest = frame
+                if learned is not None and lowest < infinity and \
+                        (node.state in learned or len(learned) < table_size):
+                    learned[node.state] = max(learned.get(node.state, 0), lowest - node.path_cost)
+                if stack:
+                    stack[-1][2] = min(stack[-1][2], lowest)
+                continue
+
+            value = f(child)
+            if value > threshold:
+                frame[2] = min(frame[2], value)
+            elif problem.goal_test(child.state):
+                return child
+            else:
+                stack.append([child, iter(child.expand(problem)), infinity])
+        threshold = lowest
+    return None
+
+def _depth_first_tree_search_all_count(problem: Problem, frontier: list, optimize: bool = False, verbose: bool = False, incumbent: Node = None) -> tuple:
     # Initialize variables to keep track of statistics
-    best_solution = None  # The best solution found
+    best_solution = incumbent  # The best solution found (a known solution, e.g. from seed_incumbent, bounds the search from the start)
     n_visited_states = 0  # Number of visited states
     n_final_states = 0   # Number of final (goal) states encountered
     max_frontier_len = 0  # Maximum length of the frontier
+    dominance = DominanceIndex(problem) if optimize else None  # Nodes already generated, to prune dominated ones
 
     # Create the initial Node and add it to the frontier as a SuperNode
     first = Node(problem.initial)
@@ -451,7 +674,7 @@ def _depth_first_tree_search_all_count(problem: Problem, frontier: list, optimiz
     # Main loop for the depth-first search
     while frontier:
         # Update the maximum frontier length
-        max_frontier_len = max(max_frontier_len, len(nonGoal(frontier))
+        max_frontier_len = max(max_frontier_len, len(nonGoal(frontier)))
 
         # Pop a SuperNode from the frontier for exploration
         competitor: SuperNode = frontier.pop()
@@ -487,6 +710,11 @@ def _depth_first_tree_search_all_count(problem: Problem, frontier: list, optimiz
             if optimize and not successor.useful:
                 continue
 
+            # Skip successors dominated by a node already generated if optimization is enabled
+            # (goals are leaves: there is nothing to save on them)
+            if optimize and not successor.goal and dominance.dominated(child):
+                continue
+
             super_node_successors.append(successor)
 
         # Reverse the order of successors to explore deeper first
@@ -497,9 +725,297 @@ def _depth_first_tree_search_all_count(problem: Problem, frontier: list, optimiz
     return (best_solution, max_frontier_len, n_visited_states, n_final_states)
 
 
-def depth_first_tree_search_all_count(problem: Problem, optimal: bool = False, verbose: bool = False) -> tuple:
+def incumbent_first(problem: Problem, node: Node, actions: list, incumbent: list) -> list:
+    """ Move ordering: the action the incumbent solution took at the depth of node first, the others after it """
+    if incumbent is None or node.depth >= len(incumbent) or incumbent[node.depth] not in actions:
+        return actions
+    preferred = incumbent[node.depth]
+    return [preferred] + [action for action in actions if action != preferred]
+
+
+def _depth_first_tree_search_lazy(problem: Problem, optimize: bool = False, order=None, incumbent: Node = None) -> tuple:
+    """
+    Lazy version of _depth_first_tree_search_all_count: the stack holds one Node.iter_children generator per
+    open node, so a child is only built (and tested) when the search gets to it, and with optimize it is
+    pruned against the best solution known at that moment rather than when its parent was expanded.
+
+    order(problem, node, actions, incumbent) is the move ordering: it returns the actions of node in the order
+    to explore them, incumbent being the actions of the best solution so far (None before the first one).
+    Children then come from problem.result and problem.path_cost, never from problem.successors, which would
+    list the actions again and yield them in its own order.
+    Cheap solutions found early prune more with optimize; without it the same nodes are visited in any order.
+    Returns the same tuple as _depth_first_tree_search_all_count, max_frontier_len being the deepest stack of
+    open nodes; incumbent is also the same initial best solution. With optimize both prune against the best
+    solution (and dominated nodes, when the problem has a dominance_key), but at different times, so only the
+    best cost is sure to be the same.
+    """
+    first = Node(problem.initial)
+    if problem.goal_test(first.state):
+        return (None, 0, 1, 1)
+
+    best_solution = incumbent
+    best_actions = incumbent.solution() if incumbent is not None else None
+    n_visited_states = 1
+    n_final_states = 0
+    dominance = DominanceIndex(problem) if optimize else None
+
+    def children(node):
+        actions = problem.actions(node.state)
+        if order is not None:
+            actions = order(problem, node, actions, best_actions)
+        return node.iter_children(problem, actions)
+
+    stack = [children(first)]
+    max_frontier_len = 1
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+
+        useful = is_useful(best_solution, child)
+        if optimize and not useful:
+            continue
+        if problem.goal_test(child.state):
+            n_visited_states += 1
+            n_final_states += 1
+            if useful:
+                best_solution, best_actions = child, child.solution()
+            continue
+        if optimize and dominance.dominated(child):
+            continue
+
+        n_visited_states += 1
+        stack.append(children(child))
+        max_frontier_len = max(max_frontier_len, len(stack))
+
+    return (best_solution, max_frontier_len, n_visited_states, n_final_states)
+
+
+def depth_first_tree_search_all_count(problem: Problem, optimal: bool = False, verbose: bool = False, order=None, incumbent: Node = None) -> tuple:
     # Wrapper function to start depth-first tree search with default parameters
-    return _depth_first_tree_search_all_count(problem, Stack(), optimal, verbose)
+    # (with a move ordering, children are built lazily instead; see _depth_first_tree_search_lazy)
+    if order is not None:
+        return _depth_first_tree_search_lazy(problem, optimal, order, incumbent)
+    return _depth_first_tree_search_all_count(problem, Stack(), optimal, verbose, incumbent)
+
+
+def _replay(problem: Problem, actions: list) -> Node:
+    """ Rebuild the Node reached from the initial state by a sequence of actions """
+    node = Node(problem.initial)
+    for action in actions:
+        node = node.child_node(problem, action)
+    return node
+
+
+def _depth_first_tree_search_inplace(problem: Problem, optimize: bool = False) -> tuple:
+    """
+    Make/unmake version of _depth_first_tree_search_all_count. The problem must provide mutable(), which
+    returns a working copy of the initial state, apply(state, action), which changes that state in place and
+    returns the step cost, and undo(state), which reverts the last apply.
+
+    Only one state is ever alive: the search keeps the actions of the current path and, for every node of
+    that path, the (action, cost, goal) of its successors still to explore. Successors are filtered by cost
+    and the best solution updated as in _depth_first_tree_search_all_count, but dominated nodes are not
+    pruned (that needs the states of the generated nodes, see DominanceIndex). Both return the same tuple,
+    unless optimize is on for a problem with a dominance_key: then the best cost is the same, but this search
+    visits more nodes and may return another solution of that cost.
+    """
+    state = problem.mutable()
+    if problem.goal_test(state):
+        return (None, 0, 1, 1)
+
+    best_cost, best_actions = None, None
+    path = []
+    costs = [0]
+
+    def successors():
+        """ (action, cost, goal) of the successors of the current state to explore, last to explore first """
+        nonlocal best_cost, best_actions
+        children = []
+        for action in problem.actions(state):
+            cost = costs[-1] + problem.apply(state, action)
+            goal = problem.goal_test(state)
+            problem.undo(state)
+
+            useful = best_cost is None or cost < best_cost
+            if useful and goal:
+                best_cost, best_actions = cost, path + [action]
+            if optimize and not useful:
+                continue
+            children.append((action, cost, goal))
+        children.reverse()
+        return children
+
+    n_visited_states = 1
+    n_final_states = 0
+    max_frontier_len = 1
+    frames = [successors()]
+    pending = sum(1 for _, _, goal in frames[0] if not goal)
+
+    while frames:
+        frame = frames[-1]
+        if not frame:
+            frames.pop()
+            if path:
+                path.pop()
+                costs.pop()
+                problem.undo(state)
+            continue
+
+        max_frontier_len = max(max_frontier_len, pending)
+        action, cost, goal = frame.pop()
+        n_visited_states += 1
+        if goal:
+            n_final_states += 1
+            continue
+
+        pending -= 1
+        problem.apply(state, action)
+        path.append(action)
+        costs.append(cost)
+        children = successors()
+        pending += sum(1 for _, _, goal in children if not goal)
+        frames.append(children)
+
+    best_solution = _replay(problem, best_actions) if best_actions is not None else None
+    return (best_solution, max_frontier_len, n_visited_states, n_final_states)
+
+
+def depth_first_tree_search_inplace(problem: Problem, optimal: bool = False) -> tuple:
+    """depth_first_tree_search_all_count in O(depth) memory, without its dominance pruning (see
+    _depth_first_tree_search_inplace): the same tuple, or only the same best cost when optimal prunes
+    dominated nodes in depth_first_tree_search_all_count."""
+    return _depth_first_tree_search_inplace(problem, optimal)
+
+
+Incumbent = namedtuple("Incumbent", "cost actions expanded elapsed gap")
+Incumbent.__doc__ = """A solution found by an anytime search: its cost and actions, the nodes expanded and the
+seconds elapsed when it was found, and the gap between its cost and a lower bound of the optimal cost."""
+
+
+def anytime_depth_first_search(problem: Problem, h=None, time_limit: float = None, node_limit: int = None):
+    """
+    Depth first branch and bound that yields an Incumbent every time it finds a cheaper solution, on the
+    make/unmake engine of _depth_first_tree_search_inplace (the problem provides mutable, apply and undo).
+
+    h (problem.h by default) must be an admissible lower bound of the cost left from a state: nodes whose
+    path cost plus h is not below the incumbent are pruned, and siblings are explored by increasing f.
+    The search stops when the tree is exhausted, after time_limit seconds or after node_limit expanded nodes,
+    and then yields the best solution once more with its final gap: 0 when the tree was exhausted (the
+    solution is optimal), else the incumbent minus the lowest f still pending. That last Incumbent has cost
+    and actions None when no solution was found.
+    """
+    h = h or problem.h
+    start = time.perf_counter()
+    state = problem.mutable()
+    if problem.goal_test(state):
+        yield Incumbent(0, [], 0, 0.0, 0)
+        return
+
+    best_cost, best_actions = infinity, None
+    path = []
+    expanded = 0
+
+    def successors(cost):
+        """ (action, cost, f) of the successors of the current state to explore, last to explore first """
+        nonlocal best_cost, best_actions
+        children = []
+        for action in problem.actions(state):
+            child_cost = cost + problem.apply(state, action)
+            if problem.goal_test(state):
+                if child_cost < best_cost:
+                    best_cost, best_actions = child_cost, path + [action]
+            else:
+                f = child_cost + h(state)
+                if f < best_cost:
+                    children.append((action, child_cost, f))
+            problem.undo(state)
+        children.sort(key=lambda child: child[2], reverse=True)
+        return children
+
+    def incumbent(gap):
+        return Incumbent(best_cost, list(best_actions), expanded, time.perf_counter() - start, gap)
+
+    def gap():
+        pending = [f for frame in frames for _, _, f in frame if f < best_cost]
+        return best_cost - min(pending, default=best_cost)
+
+    frames = [successors(0)]
+    if best_actions is not None:
+        yield incumbent(gap())
+
+    exhausted = True
+    while frames:
+        frame = frames[-1]
+        if not frame:
+            frames.pop()
+            if path:
+                path.pop()
+                problem.undo(state)
+            continue
+
+        action, cost, f = frame.pop()
+        if f >= best_cost:
+            continue
+        if node_limit is not None and expanded >= node_limit or \
+                time_limit is not None and time.perf_counter() - start >= time_limit:
+            frame.append((action, cost, f))
+            exhausted = False
+            break
+
+        expanded += 1
+        problem.apply(state, action)
+        path.append(action)
+        found = best_actions
+        frames.append(successors(cost))
+        if best_actions is not found:
+            yield incumbent(gap())
+
+    if best_actions is None:
+        yield Incumbent(None, None, expanded, time.perf_counter() - start, None)
+    else:
+        yield incumbent(0 if exhausted else gap())
+
+
+def count_tree_search(problem: Problem) -> tuple:
+    """
+    Number of visited states and of final (goal) states of depth_first_tree_search_all_count(problem), without
+    walking every path: the counts of the subtree below a state are computed once per problem.count_key and
+    summed by every parent that reaches that key. The counts are exact (Python ints), however large the tree.
+    """
+    root = problem.initial
+    if problem.goal_test(root):
+        return (1, 1)
+
+    memo = {}
+    root_key = problem.count_key(root)
+    stack = [(root_key, root, iter(problem.actions(root)), [1, 0])]
+    while stack:
+        key, state, actions, totals = stack[-1]
+        for action in actions:
+            child = problem.result(state, action)
+            if problem.goal_test(child):
+                totals[0] += 1
+                totals[1] += 1
+                continue
+
+            child_key = problem.count_key(child)
+            counts = memo.get(child_key)
+            if counts is None:
+                stack.append((child_key, child, iter(problem.actions(child)), [1, 0]))
+                break
+            totals[0] += counts[0]
+            totals[1] += counts[1]
+        else:
+            stack.pop()
+            memo[key] = counts = tuple(totals)
+            if stack:
+                parent = stack[-1][3]
+                parent[0] += counts[0]
+                parent[1] += counts[1]
+
+    return memo[root_key]
 
 # ______________________________________________________________________________
 # Bidirectional Search
@@ -631,6 +1147,167 @@ def recursive_best_first_search(problem, h=None):
     return result
 
 
+
+def best_first_tree_search_arena(problem, f, keep_states=True):
+    """Best first tree search whose nodes live in a NodeArena: the frontier
+    only holds (f, index) pairs. f gets a Node without parent (its state,
+    action, path cost and depth). With keep_states the states of the frontier
+    are kept in the arena until expanded; without, each state is rebuilt from
+    the initial state when its node is expanded, trading time for memory.
+    Returns the goal Node (with its parents) or None."""
+    arena = NodeArena(problem)
+    root = Node(problem.initial)
+    arena.add(-1, None, 0, problem.initial if keep_states else None)
+    frontier = [(f(root), 0)]
+    while frontier:
+        _, index = heapq.heappop(frontier)
+        state = arena.state(index)
+        arena.forget(index)
+        if problem.goal_test(state):
+            return arena.node(index)
+        cost = arena.costs[index]
+        for action, child_state, step_cost in successors(problem, state):
+            child_cost = cost + step_cost
+            child = arena.add(index, action, child_cost, child_state if keep_states else None)
+            node = Node(child_state, None, action, child_cost)
+            node.depth = arena.depths[child]
+            heapq.heappush(frontier, (f(node), child))
+    return None
+
+
+def astar_search_arena(problem, h=None, keep_states=True):
+    """astar_search as a tree search on a NodeArena."""
+    h = h or problem.h
+    return best_first_tree_search_arena(problem, lambda n: n.path_cost + h(n), keep_states)
+
+
+class _SMANode:
+    """A node kept in memory by sma_star_search, with what SMA* needs to know about its successors."""
+    __slots__ = ("node", "parent", "depth", "f", "goal", "children", "fresh", "forgotten", "version", "alive")
+
+    def __init__(self, node, parent, f, goal, fresh):
+        self.node = node
+        self.parent = parent
+        self.depth = node.depth
+        self.f = f
+        self.goal = goal
+        self.children = {}     # action -> _SMANode of the successors in memory
+        self.fresh = fresh     # actions never expanded yet
+        self.forgotten = {}    # action -> f of the successors dropped from memory
+        self.version = 0
+        self.alive = True
+
+    def is_open(self):
+        return self.goal or bool(self.fresh) or bool(self.forgotten)
+
+
+def _node_bytes(node: Node) -> int:
+    """Rough size of a search node and its state, to turn a byte cap into a node cap."""
+    return sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(node.state) + 256
+
+
+def sma_star_search(problem, h=None, max_nodes=None, max_bytes=None):
+    """Simplified memory-bounded A* [Russell 1992]: A* tree search that never
+    keeps more than max_nodes nodes (or about max_bytes bytes) in memory.
+    Successors are generated one at a time from the deepest node of lowest f;
+    when memory is full, the shallowest leaf of highest f is dropped and its
+    parent remembers its f, backed up as the parent's f once all its
+    successors were seen. The solution is optimal when its path fits in
+    memory (depth < max_nodes); None is returned when none does."""
+    if max_nodes is None and max_bytes is None:
+        raise ValueError("sma_star_search needs max_nodes or max_bytes")
+    h = h or problem.h
+    first = Node(problem.initial)
+    if max_bytes is not None:
+        limit = max(2, max_bytes // _node_bytes(first))
+        max_nodes = limit if max_nodes is None else min(max_nodes, limit)
+
+    tie = count()
+    frontier, leaves = [], []
+
+    def touch(n):
+        """Record a change of n: queue it again with its current f."""
+        n.version += 1
+        if n.is_open():
+            heapq.heappush(frontier, (n.f, -n.depth, next(tie), n.version, n))
+        if not n.children and n.parent is not None:
+            heapq.heappush(leaves, (-n.f, n.depth, next(tie), n.version, n))
+
+    def valid(entry):
+        n = entry[-1]
+        return n.alive and entry[-2] == n.version
+
+    def make(node, parent, f):
+        if problem.goal_test(node.state):
+            return _SMANode(node, parent, max(f, node.path_cost), True, [])
+        actions = list(problem.actions(node.state))
+        if not actions or node.depth >= max_nodes - 1:
+            return _SMANode(node, parent, infinity, False, [])
+        actions.reverse()
+        return _SMANode(node, parent, max(f, node.path_cost + h(node)), False, actions)
+
+    def compact():
+        """Rebuild the queues from the nodes in memory, dropping their stale entries."""
+        frontier.clear()
+        leaves.clear()
+        stack = [root]
+        while stack:
+            n = stack.pop()
+            touch(n)
+            stack.extend(n.children.values())
+
+    def backup(n):
+        """Once every successor of n was seen, its f is the lowest f among them."""
+        while n is not None and not n.fresh:
+            f = min([child.f for child in n.children.values()] + list(n.forgotten.values()), default=infinity)
+            if f == n.f:
+                break
+            n.f = f
+            touch(n)
+            n = n.parent
+
+    root = make(first, None, 0)
+    touch(root)
+    in_memory = 1
+    while True:
+        while frontier and not (valid(frontier[0]) and frontier[0][-1].is_open()):
+            heapq.heappop(frontier)
+        if not frontier or frontier[0][0] == infinity:
+            return None
+        best = frontier[0][-1]
+        if best.goal:
+            return best.node
+
+        if best.fresh:
+            action, inherited = best.fresh.pop(), best.f
+        else:
+            # the forgotten successor that made best the best node
+            action = min(best.forgotten, key=best.forgotten.get)
+            inherited = max(best.forgotten.pop(action), best.f)
+        child = make(best.node.child_node(problem, action), best, inherited)
+        best.children[action] = child
+        in_memory += 1
+        touch(child)
+        touch(best)
+        backup(best)
+
+        while in_memory > max_nodes:
+            while not valid(leaves[0]) or leaves[0][-1].children:
+                heapq.heappop(leaves)
+            worst = heapq.heappop(leaves)[-1]
+            worst.alive = False
+            in_memory -= 1
+            parent = worst.parent
+            action = worst.node.action
+            del parent.children[action]
+            parent.forgotten[action] = worst.f
+            touch(parent)
+            backup(parent)
+
+        if len(frontier) + len(leaves) > 8 * max_nodes:
+            compact()
+
+
 def hill_climbing(problem):
     """From the initial node, keep choosing the neighbor with highest value,
     stopping when no neighbor is better. [Figure 4.2]"""
@@ -669,6 +1346,86 @@ def simulated_annealing(problem, schedule=exp_schedule()):
             current = next
 
 
+def rollout(problem, node=None, order=None, rng=None):
+    """Complete node (the initial node by default) into a solution greedily:
+    every step takes the cheapest child, ties broken by order (a move
+    ordering, as in depth_first_tree_search_all_count) or at random with rng
+    (a random.Random). Returns the goal Node, or None at a dead end."""
+    node = node or Node(problem.initial)
+    while not problem.goal_test(node.state):
+        children = node.expand(problem)
+        if not children:
+            return None
+        if rng is not None:
+            rng.shuffle(children)
+        elif order is not None:
+            rank = {action: i for i, action in enumerate(order(problem, node, [child.action for child in children], None))}
+            children.sort(key=lambda child: rank[child.action])
+        node = min(children, key=lambda child: child.path_cost)
+    return node
+
+
+class PlanProblem(Problem):
+
+    """Local search over the solutions of a problem, for hill_climbing and
+    simulated_annealing. A state is the tuple of actions of a solution; the
+    action (i, a) keeps its first i actions, takes a instead of the next one
+    and completes the plan with rollout. The value of a plan is minus its
+    cost, and the cheapest plan valued so far is kept in best."""
+
+    def __init__(self, problem, plan, order=None):
+        super().__init__(tuple(plan))
+        self.problem = problem
+        self.order = order
+        self.costs = {}
+        self.best = self.initial
+        self.value(self.initial)
+
+    def actions(self, plan):
+        node = Node(self.problem.initial)
+        moves = []
+        for i, taken in enumerate(plan):
+            moves.extend((i, action) for action in self.problem.actions(node.state) if action != taken)
+            node = node.child_node(self.problem, taken)
+        return moves
+
+    def result(self, plan, move):
+        i, action = move
+        node = _replay(self.problem, plan[:i]).child_node(self.problem, action)
+        goal = rollout(self.problem, node, self.order)
+        return plan if goal is None else tuple(goal.solution())
+
+    def value(self, plan):
+        cost = self.costs.get(plan)
+        if cost is None:
+            cost = self.costs[plan] = _replay(self.problem, plan).path_cost
+            if cost < self.costs[self.best]:
+                self.best = plan
+        return -cost
+
+
+def seed_incumbent(problem, order=None, restarts=8, schedule=None, seed=0):
+    """A good solution found quickly, to start a branch and bound with (the
+    incumbent of depth_first_tree_search_all_count): the greedy rollout, the
+    best of restarts randomized rollouts, improved by hill_climbing over
+    plans and then, with a schedule, by simulated_annealing. Returns the
+    goal Node, or None if no rollout reached a goal."""
+    rng = random.Random(seed)
+    best = rollout(problem, order=order)
+    for _ in range(restarts):
+        node = rollout(problem, rng=rng)
+        if node is not None and (best is None or node.path_cost < best.path_cost):
+            best = node
+    if best is None:
+        return None
+
+    plans = PlanProblem(problem, best.solution(), order)
+    hill_climbing(plans)
+    if schedule is not None:
+        simulated_annealing(plans, schedule)
+    return _replay(problem, plans.best)
+
+
 def and_or_graph_search(problem):
     """[Figure 4.11]Used when the environment is nondeterministic and completely observable.
     Contains OR nodes where the agent is free to choose any action.
@@ -1466,6 +2223,14 @@ class InstrumentedProblem(Problem):
         self.problem = problem
         self.succs = self.goal_tests = self.states = 0
         self.found = None
+        if hasattr(problem, "successors"):
+            self.successors = self._successors
+
+    def _successors(self, state):
+        self.succs += 1
+        for successor in self.problem.successors(state):
+            self.states += 1
+            yield successor
 
     def actions(self, state):
         self.succs += 1
@@ -1488,6 +2253,15 @@ class InstrumentedProblem(Problem):
     def value(self, state):
         return self.problem.value(state)
 
+    def count_key(self, state):
+        return self.problem.count_key(state)
+
+    def dominance_key(self, state):
+        return self.problem.dominance_key(state)
+
+    def dominates(self, state1, cost1, state2, cost2):
+        return self.problem.dominates(state1, cost1, state2, cost2)
+
     def __getattr__(self, attr):
         return getattr(self.problem, attr)
 
@@ -8,7 +8,8 @@ import os.path
 import random
 import math
 import functools
-from itertools import chain, combinations
+import heapq
+from itertools import chain, combinations, count as counter
 
 
 # ______________________________________________________________________________
@@ -739,37 +740,89 @@ class PriorityQueue(Queue):
     """A queue in which the minimum (or maximum) element (as determined by f and
     order) is returned first. If order is min, the item with minimum f(x) is
     returned first; if order is max, then it is the item with maximum f(x).
-    Also supports dict-like lookup."""
+    Also supports dict-like lookup.
+
+    The queue is a binary heap with a dict index from item to heap entry, so
+    append, pop, lookup and deletion are O(log n) or better. Items are kept
+    unique: appending an item equal to one already queued replaces it, which
+    is how decrease_key works. Replaced and deleted entries stay in the heap,
+    marked as removed, until they reach the top. Ties in f are broken by
+    insertion order, so items never need to be comparable."""
+
+    REMOVED = object()
 
     def __init__(self, order=min, f=lambda x: x):
-        self.A = []
+        self.heap = []
+        self.entries = {}
+        self.counter = counter()
         self.order = order
         self.f = f
 
     def append(self, item):
-        bisect.insort(self.A, (self.f(item), item))
+        if item in self.entries:
+            del self[item]
+        priority = self.f(item)
+        if self.order != min:
+            priority = -priority
+        entry = [priority, next(self.counter), item]
+        self.entries[item] = entry
+        heapq.heappush(self.heap, entry)
+
+    def decrease_key(self, item):
+        """Reposition the item equal to item (adding it if absent) with the
+        priority f(item)."""
+        self.append(item)
 
     def __len__(self):
-        return len(self.A)
+        return len(self.entries)
 
     def pop(self):
-        if self.order == min:
-            return self.A.pop(0)[1]
-        else:
-            return self.A.pop()[1]
+        while self.heap:
+            _, _, item = heapq.heappop(self.heap)
+            if item is not PriorityQueue.REMOVED:
+                del self.entries[item]
+                return item
+        raise Exception('PriorityQueue is empty')
 
     def __contains__(self, item):
-        return any(item == pair[1] for pair in self.A)
+        return item in self.entries
 
     def __getitem__(self, key):
-        for _, item in self.A:
-            if item == key:
-                return item
+        entry = self.entries.get(key)
+        return entry[-1] if entry else None
 
     def __delitem__(self, key):
-        for i, (value, item) in enumerate(self.A):
-            if item == key:
-                self.A.pop(i)
+        entry = self.entries.pop(key, None)
+        if entry:
+            entry[-1] = PriorityQueue.REMOVED
+
+
+class IndexedQueue(Queue):
+
+    """Wraps a Stack, a FIFOQueue or any other queue with append and pop, and
+    keeps a count of the (hashable) items it holds, so that `item in q` is O(1)
+    instead of a scan of the whole queue."""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.index = collections.Counter()
+
+    def append(self, item):
+        self.queue.append(item)
+        self.index[item] += 1
+
+    def pop(self):
+        item = self.queue.pop()
+        self.index[item] -= 1
+        if not self.index[item]:
+            del self.index[item]
+        return item
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __contains__(self, item):
+        return item in self.index
 
 
 # ______________________________________________________________________________
@@ -0,0 +1,145 @@
+import functools
+import random
+
+import pytest
+
+from pacman.elements import Element, BoardElement
+from pacman.game import BitBoard, GameSolver, VisitCounts, PatternDatabase
+from pacman.space import Vector
+from problem.pacmanProblem import PacmanProblem
+from problem.searchPlus import astar_search, depth_first_tree_search_inplace
+from tests.worlds import SEEDS, world, cost
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_bitboard_maze(seed):
+    # a BitBoard maze is read through the mask tests, a Board maze element by element: they must agree
+    board, bitboard = PacmanProblem(world(seed)), PacmanProblem(world(seed), engine=BitBoard)
+    for name in ("rows", "dim", "walls", "gums", "ghost", "start", "moves", "region_size"):
+        assert getattr(board.maze, name) == getattr(bitboard.maze, name)
+    assert str(board.board).split() == str(bitboard.board).split()
+    assert cost(astar_search(bitboard)) == cost(astar_search(board))
+
+
+def test_bitboard_cells():
+    board = PacmanProblem().board
+    bitboard = BitBoard.from_board(board)
+    for x in range(-1, board.dim + 1):
+        for y in range(-1, board.dim + 1):
+            expected = board.get(Vector(x, y))
+            element = bitboard.get(Vector(x, y))
+            assert (element and element.get_element()) == (expected and expected.get_element())
+            index = bitboard.index(x, y)
+            if expected is None:
+                assert not bitboard.is_free(index)
+                assert not bitboard.put(BoardElement(Element.EMPTY, Vector(x, y)), Vector(x, y))
+                assert not bitboard.set_empty(Vector(x, y))
+                continue
+            assert bitboard.is_wall(index) == (expected.get_element() == Element.WALL)
+            assert bitboard.is_gum(index) == (expected.get_element() == Element.SUPER_GUM)
+            assert bitboard.is_free(index) == (expected.get_element() not in (Element.WALL, Element.GHOST))
+
+    assert bitboard.set_empty(Vector(1, 3)) and not bitboard.is_gum(bitboard.index(1, 3))
+    assert bitboard.copy().cells == bitboard.cells
+
+
+def test_bitboard_game_state():
+    problem = PacmanProblem(engine=BitBoard)
+    state = problem.game_state(problem.initial)
+    assert isinstance(state.board, BitBoard)
+    assert GameSolver.find_valid_directions(state) == ["E", "S"]
+    GameSolver.apply(state, "E", problem.conditions.P)
+    assert state.pacman.get_position() == Vector(1, 2) and state.pacman.get_steps() == 1
+
+
+def _feasible(problem):
+    """ Naive answer to FeasibilityOracle.feasible: search every path, moving only while the ghost is afraid """
+    oracle, moves, T = problem.feasibility, problem.maze.moves, problem.conditions.T
+
+    @functools.lru_cache(maxsize=None)
+    def feasible(cell, steps, fear, gums):
+        if steps >= T:
+            return True
+        if fear < 1:
+            return False
+        return any(feasible(*oracle.child(target, steps, fear, gums)) for _, target in moves[cell])
+    return feasible
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_feasibility(seed):
+    problem = PacmanProblem(world(seed))
+    maze, conditions = problem.maze, problem.conditions
+    naive = _feasible(problem)
+    for cell in filter(maze.is_free, range(maze.size)):
+        for steps in range(conditions.T + 1):
+            # fears past T and below 0 too, which must not share memo keys with other states
+            for fear in range(-1, conditions.T + 3):
+                for gums in range(maze.all_gums + 1):
+                    assert problem.feasibility.feasible(cell, steps, fear, gums) == naive(cell, steps, fear, gums)
+
+
+def test_feasibility_eating_resets_fear():
+    # every move eats a supergum, which lowers the fear from M=5 to P=1: pacman is stuck after one step
+    problem = PacmanProblem("T=5\nM=5\nP=1\n= = = = =\n= @ * F =\n= = = = =\n= = = = =\n= = = = =\n")
+    state = problem.initial
+    assert not problem.feasibility.feasible(state.cell, state.steps, state.fear, state.gums)
+    assert problem.actions(state) == []
+
+
+def test_feasibility_keys():
+    problem = PacmanProblem()
+    key, T = problem.feasibility.key, problem.conditions.T
+    # a fear past T used to spill into the cell of the key
+    assert key(12, 0, T + 1, 0) != key(13, 0, 0, 0)
+    assert key(12, 3, T, 0) == key(12, 3, T - 3, 0)
+    assert key(12, 3, -1, 0) == key(12, 3, 0, 0)
+
+
+def test_incremental_hash():
+    # random walks, going past T too: the hash kept up by GameSolver.apply is the one computed from scratch
+    problem = PacmanProblem()
+    zobrist = problem.maze.zobrist
+    rng = random.Random(0)
+    for _ in range(50):
+        state = problem.initial
+        for _ in range(rng.randrange(60)):
+            state = problem.result(state, rng.choice([action for action, _ in problem.maze.moves[state.cell]]))
+            visits = VisitCounts.from_counts(list(state.visits), zobrist)
+            assert state._hash == zobrist.hash(state.cell, state.fear, state.gums, state.steps, visits)
+        assert problem.mutable(state).freeze(problem.maze) == state
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_hash_collisions(seed):
+    # over the whole tree of a world, equal states share their key and different states never do
+    problem = PacmanProblem(world(seed))
+    keys = {}
+    stack = [problem.initial]
+    while stack:
+        state = stack.pop()
+        fields = (state.cell, state.fear, state.gums, state.steps, tuple(state.visits))
+        assert keys.setdefault(fields, state._hash) == state._hash
+        if not problem.goal_test(state):
+            stack.extend(problem.result(state, action) for action in problem.actions(state))
+    assert len(set(keys.values())) == len(keys)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_pattern_database(seed, tmp_path, monkeypatch):
+    problem = PacmanProblem(world(seed), heuristic="pattern", pattern_directory=str(tmp_path))
+    optimum = cost(depth_first_tree_search_inplace(problem, True)[0])
+    assert cost(astar_search(problem)) == optimum
+
+    # the first use saved the database under its key, and it loads back identical
+    maze, T, M, P = problem.maze, problem.conditions.T, problem.conditions.M, problem.conditions.P
+    assert [path.name for path in tmp_path.iterdir()] == [PatternDatabase.key(maze, T, P, M) + ".pdb"]
+    loaded = PatternDatabase.load(str(tmp_path), maze, T, P, M)
+    built = problem.patterns
+    assert (loaded.typecode, loaded.fears, loaded.table) == (built.typecode, built.fears, built.table)
+    assert PatternDatabase.load(str(tmp_path), maze, T + 1, P, M) is None
+
+    # once saved, cached loads it instead of building it again
+    monkeypatch.setattr(PatternDatabase, "_build", lambda database: pytest.fail("database built again"))
+    assert PatternDatabase.cached(maze, T, P, M, str(tmp_path)).table == built.table
+    assert cost(astar_search(PacmanProblem(world(seed), heuristic="pattern", pattern_directory=str(tmp_path)))) == optimum
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from problem.pacmanProblem import PacmanProblem
+from problem.parallelSearch import (
+    parallel_depth_first_tree_search, parallel_astar_search, parallel_uniform_cost_search
+)
+from problem.searchPlus import depth_first_tree_search_inplace, astar_search
+from tests.worlds import SEEDS, world, cost
+
+
+class _Raising(PacmanProblem):
+    """ Raises in whichever worker looks for the moves of a state two steps deep """
+    def actions(self, state):
+        if state.steps == 2:
+            raise ValueError("third step")
+        return super().actions(state)
+
+
+class _Dying(PacmanProblem):
+    """ Kills whichever worker looks for the moves of a state two steps deep, without a report """
+    def actions(self, state):
+        if state.steps == 2:
+            os._exit(3)
+        return super().actions(state)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_parallel_branch_and_bound(seed):
+    # without optimal the whole tree is walked, so the counts are the sequential ones; the best solution is
+    # the sequential one either way
+    problem = PacmanProblem(world(seed))
+    expected = depth_first_tree_search_inplace(problem)
+    best = depth_first_tree_search_inplace(problem, True)[0]
+    for workers in (1, 2, 3):
+        found = parallel_depth_first_tree_search(problem, workers=workers)
+        assert (cost(found[0]), found[2:]) == (cost(expected[0]), expected[2:])
+        found = parallel_depth_first_tree_search(problem, True, workers=workers)[0]
+        assert (found and found.solution()) == (best and best.solution())
+
+
+def test_parallel_branch_and_bound_failures():
+    with pytest.raises(ValueError, match="third step"):
+        parallel_depth_first_tree_search(_Raising(world(0)), workers=2)
+    with pytest.raises(RuntimeError, match="exit code 3"):
+        parallel_depth_first_tree_search(_Dying(world(0)), workers=2)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_parallel_best_first(seed):
+    # the goal node is rebuilt from the initial state: it must be a goal, reached at the optimal cost
+    problem = PacmanProblem(world(seed))
+    optimum = cost(astar_search(problem))
+    for workers in (1, 2, 3):
+        for found in (parallel_astar_search(problem, workers=workers),
+                      parallel_uniform_cost_search(problem, workers=workers)):
+            assert cost(found) == optimum
+            assert found is None or problem.goal_test(found.state) and len(found.solution()) == problem.conditions.T
+
+
+def test_parallel_best_first_failures():
+    with pytest.raises(ValueError, match="third step"):
+        parallel_astar_search(_Raising(world(0)), workers=2)
+    with pytest.raises(RuntimeError, match="exit code 3"):
+        parallel_astar_search(_Dying(world(0)), workers=2)
@@ -0,0 +1,65 @@
+import os
+import time
+
+import pytest
+
+from problem.pacmanProblem import PacmanProblem
+from problem.searchPlus import seed_incumbent, depth_first_tree_search_inplace, _replay
+from problem import portfolio
+from problem.portfolio import portfolio_search, default_order, load_stats
+from tests.worlds import SEEDS, world, cost
+
+
+def _crash(problem, report):
+    os._exit(3)
+
+
+def _stall(problem, report):
+    time.sleep(60)
+
+
+def _unproven(problem, report):
+    report(seed_incumbent(problem), False)
+    time.sleep(60)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_worlds(seed):
+    # without a deadline the race only ends on an answer proven optimal, and its actions replay to it
+    problem = PacmanProblem(world(seed))
+    optimum = cost(depth_first_tree_search_inplace(problem, True)[0])
+    outcome = portfolio_search(problem, workers=2)
+    assert outcome.cost == optimum
+    assert outcome.optimal or optimum is None
+    assert optimum is None or cost(_replay(problem, outcome.actions)) == optimum
+
+
+def test_crashed_engine(monkeypatch):
+    # the crash takes the only worker: the next engine must still start, and the race end without a deadline
+    monkeypatch.setitem(portfolio.engines, "crash", _crash)
+    outcome = portfolio_search(PacmanProblem(), names=["crash", "astar"], workers=1)
+    assert (outcome.engine, outcome.cost, outcome.optimal) == ("astar", 32, True)
+
+
+def test_deadline(monkeypatch):
+    monkeypatch.setitem(portfolio.engines, "stall", _stall)
+    monkeypatch.setitem(portfolio.engines, "unproven", _unproven)
+    start = time.perf_counter()
+    outcome = portfolio_search(PacmanProblem(), names=["stall"], deadline=0.5)
+    assert outcome.cost is None and time.perf_counter() - start < 5
+
+    outcome = portfolio_search(PacmanProblem(), names=["stall", "unproven"], deadline=2, workers=2)
+    assert outcome.engine == "unproven" and outcome.cost >= 32 and not outcome.optimal
+
+
+def test_stats(tmp_path):
+    path = str(tmp_path / "stats.json")
+    portfolio_search(PacmanProblem(), names=["astar"], stats=path, key="standard")
+    record = load_stats(path)["standard"]["astar"]
+    assert (record["runs"], record["wins"]) == (1, 1)
+    assert default_order(load_stats(path), "standard", ["depth_first", "astar"]) == ["astar", "depth_first"]
+    assert default_order(load_stats(path), "other", ["depth_first", "astar"]) == ["depth_first", "astar"]
+
+    stats = {"k": {"slow": {"runs": 2, "wins": 2, "seconds": 4.0}, "fast": {"runs": 2, "wins": 2, "seconds": 1.0},
+                   "often": {"runs": 3, "wins": 3, "seconds": 30.0}}}
+    assert default_order(stats, "k", ["slow", "fast", "often", "never"]) == ["often", "fast", "slow", "never"]
@@ -0,0 +1,310 @@
+import random
+import sys
+
+import pytest
+
+from problem.pacmanProblem import PacmanProblem
+from problem.searchPlus import (
+    depth_first_tree_search_all_count, depth_first_tree_search_inplace, count_tree_search, astar_search,
+    astar_search_arena, anytime_depth_first_search, iterative_deepening_astar_search, sma_star_search,
+    uniform_cost_search, Node, _node_bytes, _replay, Graph, GraphProblem, romania_map, depth_limited_search,
+    iterative_deepening_search, NodeArena, incumbent_first, successors, seed_incumbent, rollout, exp_schedule
+)
+from problem import searchPlus
+from problem.pacmanOrderings import orderings
+from problem.pacmanHeuristics import heuristics
+from tests.worlds import SEEDS, world, cost
+
+
+
+def test_standard_world():
+    problem = PacmanProblem()
+    assert cost(astar_search(problem)) == 32
+    assert count_tree_search(problem) == (3085382, 2129722)
+
+
+def test_standard_world_goals():
+    # walks the whole tree of 3085382 nodes
+    _, _, n_visited_states, n_final_states = depth_first_tree_search_inplace(PacmanProblem())
+    assert (n_visited_states, n_final_states) == (3085382, 2129722)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_counts(seed):
+    problem = PacmanProblem(world(seed))
+    expected = depth_first_tree_search_all_count(problem)
+    assert count_tree_search(problem) == expected[2:]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_inplace(seed):
+    # the make/unmake engine walks the same tree as the node-copying one, and undo restores every state
+    problem = PacmanProblem(world(seed))
+    expected = depth_first_tree_search_all_count(problem)
+    assert depth_first_tree_search_inplace(problem)[1:] == expected[1:]
+    optimum = cost(depth_first_tree_search_all_count(problem, True)[0])
+    assert cost(depth_first_tree_search_inplace(problem, True)[0]) == optimum
+
+    rng = random.Random(seed)
+    state = problem.mutable()
+    path = [problem.initial]
+    for _ in range(problem.conditions.T):
+        actions = list(problem.actions(path[-1]))
+        if not actions:
+            break
+        action = rng.choice(actions)
+        problem.apply(state, action)
+        path.append(problem.result(path[-1], action))
+        assert state.freeze(problem.maze) == path[-1]
+    while len(path) > 1:
+        problem.undo(state)
+        path.pop()
+        assert state.freeze(problem.maze) == path[-1]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_successors(seed):
+    # over the whole tree, the fused successors are the ones built from actions, result and path_cost
+    problem = PacmanProblem(world(seed))
+    stack = [problem.initial]
+    while stack:
+        state = stack.pop()
+        separate = [(action, problem.result(state, action)) for action in problem.actions(state)]
+        separate = [(action, next, problem.path_cost(0, state, action, next)) for action, next in separate]
+        assert list(successors(problem, state)) == separate
+        if not problem.goal_test(state):
+            stack.extend(next for _, next, _ in separate)
+
+    # problems without successors get them from actions, result and path_cost
+    romania = GraphProblem("Arad", "Bucharest", romania_map)
+    assert sorted(successors(romania, "Arad")) == [("Sibiu", "Sibiu", 140), ("Timisoara", "Timisoara", 118),
+                                                   ("Zerind", "Zerind", 75)]
+
+
+def _as_listed(problem, node, actions, incumbent):
+    return actions
+
+
+def _permuting(order):
+    """ order, checking that it returns the same actions in another order """
+    def checked(problem, node, actions, incumbent):
+        ordered = order(problem, node, actions, incumbent)
+        assert sorted(ordered) == sorted(actions)
+        return ordered
+    return checked
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_orderings(seed, monkeypatch):
+    # an ordering only changes when nodes are met: the whole tree is the same, and so is the optimum
+    problem = PacmanProblem(world(seed))
+    expected = depth_first_tree_search_all_count(problem)
+    optimum = cost(depth_first_tree_search_all_count(problem, True)[0])
+    for order in (_as_listed, *orderings.values()):
+        assert depth_first_tree_search_all_count(problem, order=_permuting(order))[2:] == expected[2:]
+        assert cost(depth_first_tree_search_all_count(problem, True, order=_permuting(order))[0]) == optimum
+
+    # built lazily, children are pruned against the incumbent of the moment, so fewer are built at all
+    built = []
+    successors, result = problem.successors, problem.result
+    monkeypatch.setattr(problem, "successors",
+                        lambda state: [child for child in successors(state) if not built.append(child)])
+    monkeypatch.setattr(problem, "result", lambda state, action: built.append(action) or result(state, action))
+    depth_first_tree_search_all_count(problem, True)
+    eager = len(built)
+    built.clear()
+    depth_first_tree_search_all_count(problem, True, order=_as_listed)
+    assert len(built) <= eager
+
+
+def test_incumbent_first():
+    problem = PacmanProblem(world(0))
+    node = Node(problem.initial)
+    assert incumbent_first(problem, node, ["w", "a", "s"], None) == ["w", "a", "s"]
+    assert incumbent_first(problem, node, ["w", "a", "s"], ["s", "w"]) == ["s", "w", "a"]
+    assert incumbent_first(problem, node, ["w", "a"], ["s", "w"]) == ["w", "a"]
+    assert incumbent_first(problem, Node(problem.initial, node, "s"), ["w", "a"], ["s"]) == ["w", "a"]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_seed_incumbent(seed):
+    # a solution at least as good as the greedy rollout, which only ever lets branch and bound prune more
+    problem = PacmanProblem(world(seed))
+    plain = depth_first_tree_search_all_count(problem, True)
+    optimum = cost(plain[0])
+    incumbent = seed_incumbent(problem)
+    if optimum is None:
+        assert incumbent is None and rollout(problem) is None
+        return
+    assert problem.goal_test(incumbent.state) and cost(_replay(problem, incumbent.solution())) == incumbent.path_cost
+    assert optimum <= incumbent.path_cost <= cost(rollout(problem))
+    assert seed_incumbent(problem).solution() == incumbent.solution()
+    assert optimum <= cost(seed_incumbent(problem, schedule=exp_schedule(limit=50))) <= incumbent.path_cost
+
+    seeded = depth_first_tree_search_all_count(problem, True, incumbent=incumbent)
+    assert cost(seeded[0]) == optimum and seeded[2] <= plain[2]
+    assert cost(depth_first_tree_search_all_count(problem, True, order=orderings["incumbent"],
+                                                  incumbent=incumbent)[0]) == optimum
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("heuristic", ["max", "zero"])
+def test_anytime(seed, heuristic):
+    problem = PacmanProblem(world(seed), heuristic=heuristic)
+    optimum = cost(depth_first_tree_search_inplace(problem, True)[0])
+    incumbents = list(anytime_depth_first_search(problem))
+    final = incumbents[-1]
+    assert (final.cost, final.gap) == ((None, None) if optimum is None else (optimum, 0))
+    assert optimum is None or cost(_replay(problem, final.actions)) == optimum
+    improving = [incumbent.cost for incumbent in incumbents[:-1]]
+    assert improving == sorted(set(improving), reverse=True)
+
+    # stopped early, the search ends on its best solution so far, and its cost minus the gap is a lower
+    # bound of the optimum; without a heuristic the gap stays open until the tree is exhausted
+    gaps = []
+    for node_limit in range(0, final.expanded, max(1, final.expanded // 40)):
+        stopped = list(anytime_depth_first_search(problem, node_limit=node_limit))
+        last = stopped[-1]
+        assert last.expanded <= node_limit
+        if last.cost is not None:
+            assert stopped[-2].cost == last.cost
+            assert 0 <= last.cost - optimum <= last.gap
+            gaps.append(last.gap)
+    assert heuristic != "zero" or optimum is None or max(gaps) > 0
+    assert list(anytime_depth_first_search(problem, time_limit=0))[-1].expanded == 0
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_ida_star(seed, monkeypatch):
+    # the transposition table only raises h to bounds learned in failed passes: the optimum stays, and without
+    # a heuristic a bigger table never expands more nodes
+    problem = PacmanProblem(world(seed), heuristic="zero")
+    optimum = cost(depth_first_tree_search_inplace(problem, True)[0])
+    expanded = []
+    successors = problem.successors
+    monkeypatch.setattr(problem, "successors", lambda state: expanded.append(state) or successors(state))
+    counts = []
+    for table_size in (0, 10, 10 ** 6):
+        expanded.clear()
+        assert cost(iterative_deepening_astar_search(problem, table_size=table_size)) == optimum
+        counts.append(len(expanded))
+    assert counts == sorted(counts, reverse=True)
+    assert optimum is None or counts[-1] < counts[0]
+    problem.use_heuristic("max")
+    assert cost(iterative_deepening_astar_search(problem)) == optimum
+    assert cost(iterative_deepening_astar_search(problem, table_size=10 ** 6)) == optimum
+
+
+def test_depth_limited_search():
+    # the explicit stack goes deeper than the recursion limit
+    depth = sys.getrecursionlimit() + 1000
+    chain = GraphProblem(0, depth, Graph({i: {i + 1: 1} for i in range(depth)}, directed=True))
+    assert len(depth_limited_search(chain, depth).solution()) == depth
+    assert depth_limited_search(chain, depth - 1) == "cutoff"
+    assert depth_limited_search(GraphProblem(0, -1, chain.graph), depth + 1) is None
+    assert iterative_deepening_search(GraphProblem("Arad", "Bucharest", romania_map)).solution() == \
+        ["Sibiu", "Fagaras", "Bucharest"]
+
+
+class _PeakArena(NodeArena):
+    """ NodeArena that records the most states it ever held in its side table """
+    peak = 0
+
+    def add(self, parent, action, path_cost, state=None):
+        index = super().add(parent, action, path_cost, state)
+        _PeakArena.peak = max(_PeakArena.peak, len(self.states))
+        return index
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_arena(seed, monkeypatch):
+    # without keep_states the arena holds no state at all, and replaying them finds the same optimum
+    problem = PacmanProblem(world(seed))
+    optimum = cost(astar_search(problem))
+    monkeypatch.setattr(searchPlus, "NodeArena", _PeakArena)
+    for keep_states in (True, False):
+        _PeakArena.peak = 0
+        found = astar_search_arena(problem, keep_states=keep_states)
+        assert cost(found) == optimum
+        assert found is None or cost(_replay(problem, found.solution())) == optimum
+        assert (_PeakArena.peak > 0) == keep_states
+
+
+def test_node_arena():
+    problem = PacmanProblem(world(0))
+    arena = NodeArena(problem)
+    root = arena.add(-1, None, 0)
+    index = root
+    for action, _ in problem.maze.moves[problem.initial.cell][:1] * 3:
+        index = arena.add(index, action, arena.costs[index] + 1)
+    path = arena.solution(index)
+    assert len(path) == arena.depths[index] == 3 and arena.costs[index] == 3
+    assert arena.state(index) == _replay(problem, path).state and not arena.states
+    kept = arena.add(index, path[0], 4, problem.initial)
+    assert arena.state(kept) is problem.initial
+    arena.forget(kept)
+    assert not arena.states and arena.nbytes() == 21 * len(arena)
+
+    for action in range(255 - len(arena.actions) + 1):
+        arena.add(root, action, 1)
+    with pytest.raises(OverflowError):
+        arena.add(root, "one too many", 1)
+
+
+def _costs_to_go(problem, node, found):
+    """ Cheapest cost from node to a goal (None without any), for node and every node below it, into found """
+    if problem.goal_test(node.state):
+        found.append((node.state, 0))
+        return 0
+    best = None
+    for child in node.expand(problem):
+        rest = _costs_to_go(problem, child, found)
+        if rest is not None and (best is None or child.path_cost - node.path_cost + rest < best):
+            best = child.path_cost - node.path_cost + rest
+    found.append((node.state, best))
+    return best
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_heuristics(seed):
+    # every heuristic is a lower bound on the cost left, from any node of the tree, so A* stays optimal with it
+    problem = PacmanProblem(world(seed))
+    found = []
+    optimum = _costs_to_go(problem, Node(problem.initial), found)
+    for name, h in heuristics.items():
+        assert all(h(problem, state) <= rest for state, rest in found if rest is not None), name
+        problem.use_heuristic(name)
+        assert cost(astar_search(problem)) == optimum
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sma_star(seed, monkeypatch):
+    # without a heuristic SMA* generates far more successors than it may keep: the optimum must survive the
+    # nodes it drops, as long as a whole path (T + 1 nodes) fits in memory
+    problem = PacmanProblem(world(seed), heuristic="zero")
+    optimum = cost(depth_first_tree_search_inplace(problem, True)[0])
+    T = problem.conditions.T
+    generated = []
+    result = problem.result
+    monkeypatch.setattr(problem, "result", lambda state, action: generated.append(action) or result(state, action))
+    for max_nodes in (T + 1, T + 3):
+        generated.clear()
+        assert cost(sma_star_search(problem, max_nodes=max_nodes)) == optimum
+        assert optimum is None or len(generated) > max_nodes
+    assert cost(sma_star_search(problem, max_bytes=(T + 1) * _node_bytes(Node(problem.initial)))) == optimum
+    assert sma_star_search(problem, max_nodes=T) is None
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dominance(seed):
+    # pruning dominated nodes keeps the optimum of the searches that do not prune, and only ever visits fewer nodes
+    plain = PacmanProblem(world(seed))
+    optimum = cost(depth_first_tree_search_inplace(plain, True)[0])
+    problem = PacmanProblem(world(seed), dominance=True)
+    pruned = depth_first_tree_search_all_count(problem, True)
+    assert cost(pruned[0]) == optimum
+    assert pruned[2] <= depth_first_tree_search_all_count(plain, True)[2]
+    for order in orderings.values():
+        assert cost(depth_first_tree_search_all_count(problem, True, order=order)[0]) == optimum
+    assert cost(uniform_cost_search(problem)) == optimum
+    assert cost(astar_search(problem)) == optimum
@@ -0,0 +1,95 @@
+import pytest
+
+from problem.pacmanProblem import PacmanProblem
+from problem.searchPlus import (
+    GraphProblem, Node, romania_map, breadth_first_search, depth_first_graph_search, graph_search_count,
+    uniform_cost_search
+)
+from problem.utils import Stack, FIFOQueue, IndexedQueue, PriorityQueue
+from tests.worlds import world, cost
+
+
+def test_indexed_queue():
+    # the index counts every copy of an item: it stays a member until the last copy is popped
+    for queue, popped in ((Stack(), "cbba"), (FIFOQueue(), "abbc")):
+        frontier = IndexedQueue(queue)
+        frontier.extend("abbc")
+        assert len(frontier) == 4 and "b" in frontier and "d" not in frontier
+        order = ""
+        while frontier:
+            order += frontier.pop()
+            assert (order.count("b") < 2) == ("b" in frontier)
+        assert order == popped and not frontier.index
+
+
+def _graph_search_scan(problem, frontier):
+    """ graph_search_count as it was before the index: explored states in a list, both duplicate checks are scans """
+    frontier.append(Node(problem.initial))
+    explored = []
+    expanded = 0
+    while frontier:
+        node = frontier.pop()
+        expanded += 1
+        if problem.goal_test(node.state):
+            return node, expanded
+        explored.append(node.state)
+        frontier.extend(child for child in node.expand(problem)
+                        if child.state not in explored and child not in frontier)
+    return None, expanded
+
+
+def test_graph_search():
+    problem = GraphProblem("Arad", "Bucharest", romania_map)
+    assert breadth_first_search(problem).solution() == ["Sibiu", "Fagaras", "Bucharest"]
+    assert depth_first_graph_search(problem).solution()[-1] == "Bucharest"
+
+
+# the worlds small enough to scan: breadth first, world 0 takes 90s scanning and 0.5s hashed
+@pytest.mark.parametrize("seed", (1, 4, 7))
+def test_graph_search_expansions(seed):
+    # the hashed explored set and the indexed frontier expand the same nodes, in the same order, as scans
+    problem = PacmanProblem(world(seed))
+    for queue in (Stack, FIFOQueue):
+        goal, expanded = graph_search_count(problem, queue())
+        expected, scanned = _graph_search_scan(problem, queue())
+        assert (cost(goal), expanded) == (cost(expected), scanned)
+        assert goal is None or goal.solution() == expected.solution()
+
+
+def test_priority_queue():
+    # ties in f pop in insertion order, with either order
+    priorities = {"a": 2, "b": 3, "c": 1, "d": 2}
+    for order, popped in ((min, "cadb"), (max, "badc")):
+        frontier = PriorityQueue(order, f=priorities.get)
+        frontier.extend("abcd")
+        assert len(frontier) == 4 and "a" in frontier and "e" not in frontier
+        assert "".join(frontier.pop() for _ in range(4)) == popped
+        assert not frontier
+        with pytest.raises(Exception):
+            frontier.pop()
+
+
+def test_priority_queue_decrease_key():
+    # an item equal to one queued replaces it: the old entry is only marked removed, and skipped when popped
+    frontier = PriorityQueue(min, f=lambda node: node.path_cost)
+    frontier.extend([Node("A", path_cost=5), Node("B", path_cost=3)])
+    frontier.decrease_key(Node("A", path_cost=1))
+    assert len(frontier) == 2 and len(frontier.heap) == 3
+    assert frontier[Node("A")].path_cost == 1
+    assert [(node.state, node.path_cost) for node in (frontier.pop(), frontier.pop())] == [("A", 1), ("B", 3)]
+    assert not frontier and len(frontier.heap) == 1
+    with pytest.raises(Exception):
+        frontier.pop()
+    assert not frontier.heap
+
+    frontier.extend([Node("A", path_cost=1), Node("B", path_cost=3)])
+    del frontier[Node("A")]
+    del frontier[Node("C")]
+    assert Node("A") not in frontier and frontier[Node("A")] is None and Node("B") in frontier
+    assert frontier.pop().state == "B" and not frontier
+
+
+def test_uniform_cost_search():
+    # Bucharest is queued at 450 through Fagaras, then decreased to 418 through Pitesti
+    node = uniform_cost_search(GraphProblem("Arad", "Bucharest", romania_map))
+    assert (node.path_cost, node.solution()) == (418, ["Sibiu", "Rimnicu", "Pitesti", "Bucharest"])
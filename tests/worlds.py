@@ -0,0 +1,24 @@
+"""Small seeded Pacman worlds shared by the tests."""
+
+import random
+
+
+# five solvable worlds (trees of 349 to 42928 nodes) and one without any solution; dominance pruning that
+# ignores the visit counts gets a wrong optimum on world 31
+SEEDS = (0, 1, 4, 7, 8, 31)
+
+
+def world(seed: int, dim: int = 7) -> str:
+    """ A small square world: walled border, a few inner walls, pacman, the ghost and two supergums """
+    rng = random.Random(seed)
+    inner = [(x, y) for x in range(1, dim - 1) for y in range(1, dim - 1)]
+    rng.shuffle(inner)
+    grid = [["=" if x in (0, dim - 1) or y in (0, dim - 1) else "." for y in range(dim)] for x in range(dim)]
+    for (x, y), element in zip(inner, ["@", "F", "*", "*", "=", "="]):
+        grid[x][y] = element
+    T, M, P = rng.randint(10, 13), rng.randint(3, 6), rng.randint(3, 6)
+    return f"T={T}\nM={M}\nP={P}\n" + "".join(" ".join(line) + "\n" for line in grid)
+
+
+def cost(node):
+    return None if node is None else node.path_cost